@@ -0,0 +1,86 @@
+# benchmarks/db_pool.py
+"""
+Micro-benchmark du pool de connexions SQLite de database_handler : requêtes par seconde
+pour un mélange de lectures chaudes, comparé à l'ancien schéma (une connexion aiosqlite,
+donc un thread, ouverte et fermée à chaque requête). Même SQL et même base dans les deux cas.
+
+    python benchmarks/db_pool.py                         # 10 000 requêtes, 100 en parallèle
+    python benchmarks/db_pool.py --calls 50000 --concurrency 500
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiosqlite
+import database_handler as db
+
+GUILDS, USERS, ROLES = 20, 500, 50
+COMMANDS = ("ban", "kick", "mute", "warn", "clear")
+
+# (fonction du pool, requête équivalente, générateur de paramètres)
+QUERIES = [
+    (db.get_user_sanctions, "SELECT * FROM sanctions WHERE guild_id = ? AND user_id = ?",
+     lambda: (random.randrange(GUILDS), random.randrange(USERS))),
+    (db.check_permission_for_role, "SELECT id FROM permissions WHERE role_id = ? AND command = ?",
+     lambda: (random.randrange(ROLES), random.choice(COMMANDS))),
+    (db.get_permissions_for_role, "SELECT command FROM permissions WHERE guild_id = ? AND role_id = ?",
+     lambda: (random.randrange(GUILDS), random.randrange(ROLES))),
+    (db.get_whitelist, "SELECT user_id FROM antiraid_whitelist WHERE guild_id = ?",
+     lambda: (random.randrange(GUILDS),)),
+]
+
+async def seed():
+    await db.setup_database()
+    for guild_id in range(GUILDS):
+        for role_id in range(ROLES):
+            await db.grant_permission(guild_id, role_id, random.choice(COMMANDS))
+        for user_id in random.sample(range(USERS), 50):
+            await db.add_sanction(guild_id, user_id, 0, "warn", "benchmark")
+            await db.add_to_whitelist(guild_id, user_id)
+
+async def per_call_connection(function, query, params):
+    """Ancien schéma : une connexion par requête."""
+    async with aiosqlite.connect(db.DB_FILE) as conn:
+        cursor = await conn.execute(query, params)
+        return await cursor.fetchall()
+
+async def pooled(function, query, params):
+    return await function(*params)
+
+async def measure(runner, calls: int, concurrency: int):
+    random.seed(0)
+    jobs = [(function, query, make_params()) for function, query, make_params in (random.choice(QUERIES) for _ in range(calls))]
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(function, query, params):
+        async with semaphore:
+            await runner(function, query, params)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(*job) for job in jobs))
+    return calls / (time.perf_counter() - start)
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        try:
+            await seed()
+            before = await measure(per_call_connection, args.calls, args.concurrency)
+            after = await measure(pooled, args.calls, args.concurrency)
+        finally:
+            await db.close_database()
+    print(f"{args.calls} requêtes, {args.concurrency} en parallèle")
+    print(f"   connexion par requête : {before:10.0f} requêtes/s")
+    print(f"   pool de connexions    : {after:10.0f} requêtes/s  (x{after / before:.1f})")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Requêtes/s du pool SQLite comparé à une connexion par requête.")
+    parser.add_argument('--calls', type=int, default=10000, help="Nombre de requêtes par mesure")
+    parser.add_argument('--concurrency', type=int, default=100, help="Requêtes en vol simultanément")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,105 @@
+# benchmarks/fake_webhook_server.py
+"""
+Faux serveur de webhooks Discord, en local, pour tester utils/webhook_transport.py sans réseau.
+Il répond à l'exécution d'un webhook (POST /api/v10/webhooks/{id}/{token}) comme Discord :
+204 si le webhook existe, 404 "Unknown Webhook" s'il a été supprimé. Les salons factices
+(FakeWebhookChannel) listent et créent leurs webhooks directement dans l'état du serveur.
+
+Pour y diriger py-cord :
+    discord.http.Route.API_BASE_URL = server.base_url
+
+    python benchmarks/fake_webhook_server.py --port 8080   # lancé seul, affiche chaque message reçu
+"""
+import argparse
+import asyncio
+import itertools
+import types
+
+import discord
+from aiohttp import web
+
+class FakeWebhookServer:
+    def __init__(self):
+        self.webhooks = {} # {webhook_id: (channel_id, token)}
+        self.messages = [] # [(webhook_id, payload)]
+        self.peers = set() # (hôte, port) des connexions clientes vues
+        self.port = None
+        self._ids = itertools.count(1)
+        self._runner = None
+        self.on_message = None # rappel optionnel (webhook_id, payload)
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/api/v{{API_VERSION}}"
+
+    async def start(self, port: int = 0):
+        app = web.Application()
+        app.router.add_post('/api/v{version}/webhooks/{webhook_id}/{token}', self._execute)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, '127.0.0.1', port).start()
+        self.port = self._runner.addresses[0][1]
+
+    async def stop(self):
+        if self._runner: await self._runner.cleanup()
+
+    def create_webhook(self, channel_id: int):
+        webhook_id = next(self._ids)
+        token = f"token-{webhook_id}"
+        self.webhooks[webhook_id] = (channel_id, token)
+        return webhook_id, token
+
+    def delete_webhooks(self, channel_id: int):
+        """Simule un administrateur qui supprime les webhooks d'un salon."""
+        for webhook_id in [i for i, (c, _) in self.webhooks.items() if c == channel_id]:
+            del self.webhooks[webhook_id]
+
+    def channel(self, channel_id: int, owner, forbidden: bool = False):
+        return FakeWebhookChannel(self, channel_id, owner, forbidden)
+
+    async def _execute(self, request: web.Request):
+        self.peers.add(request.transport.get_extra_info('peername'))
+        webhook_id = int(request.match_info['webhook_id'])
+        webhook = self.webhooks.get(webhook_id)
+        if webhook is None or webhook[1] != request.match_info['token']:
+            return web.json_response({'message': "Unknown Webhook", 'code': 10015}, status=404)
+        payload = await request.json()
+        self.messages.append((webhook_id, payload))
+        if self.on_message: self.on_message(webhook_id, payload)
+        return web.Response(status=204)
+
+class FakeWebhookChannel:
+    """Salon textuel réduit aux appels de gestion des webhooks (passant normalement par le client du bot)."""
+    def __init__(self, server: FakeWebhookServer, channel_id: int, owner, forbidden: bool):
+        self.server, self.id, self.owner, self.forbidden = server, channel_id, owner, forbidden
+        self.api_calls = 0
+
+    def _check(self):
+        self.api_calls += 1
+        if self.forbidden:
+            raise discord.Forbidden(types.SimpleNamespace(status=403, reason="Forbidden"), "Missing Permissions")
+
+    async def webhooks(self):
+        self._check()
+        return [types.SimpleNamespace(id=i, token=t, user=self.owner) for i, (c, t) in self.server.webhooks.items() if c == self.id]
+
+    async def create_webhook(self, name, reason=None):
+        self._check()
+        webhook_id, token = self.server.create_webhook(self.id)
+        return types.SimpleNamespace(id=webhook_id, token=token, user=self.owner)
+
+async def main(port: int):
+    server = FakeWebhookServer()
+    server.on_message = lambda webhook_id, payload: print(f"webhook {webhook_id}: {len(payload.get('embeds', []))} embed(s)")
+    await server.start(port)
+    webhook_id, token = server.create_webhook(0)
+    print(f"En écoute sur {server.base_url} — webhook de test : {webhook_id}/{token}")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Faux serveur de webhooks Discord en local.")
+    parser.add_argument('--port', type=int, default=8080)
+    asyncio.run(main(parser.parse_args().port))
@@ -0,0 +1,354 @@
+# benchmarks/raid_sim.py
+"""
+Banc d'essai hors ligne : simule des vagues d'événements (raid de joins, flood de messages,
+création de salons en masse...) et les envoie aux vrais listeners des cogs AntiRaid,
+Automation et Logs, via un faux bot et une fausse couche HTTP. Aucune connexion Discord.
+
+Pour chaque scénario : percentiles de latence par événement, requêtes SQL par événement,
+appels API par événement (et détail par route), temps pour vider les files de fond.
+
+    python benchmarks/raid_sim.py                 # tous les scénarios
+    python benchmarks/raid_sim.py joins --scale 5 # un scénario, 5x plus d'événements
+"""
+import argparse
+import asyncio
+import itertools
+import os
+import sys
+import tempfile
+import time
+import types
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aiosqlite
+import discord
+import database_handler as db
+from cogs.antiraid import AntiRaid
+from cogs.automation import Automation
+from cogs.logs import Logs
+
+_ids = itertools.count(10**17)
+
+# --- Instrumentation ---
+class Counters:
+    def __init__(self):
+        self.db_queries = 0
+        self.api_calls = Counter()
+
+COUNTERS = Counters()
+
+def _count_queries(method):
+    def wrapper(self, *args, **kwargs):
+        COUNTERS.db_queries += 1
+        return method(self, *args, **kwargs)
+    return wrapper
+
+aiosqlite.Connection.execute = _count_queries(aiosqlite.Connection.execute)
+aiosqlite.Connection.executemany = _count_queries(aiosqlite.Connection.executemany)
+
+class FakeHTTP:
+    """Remplace l'API REST : compte chaque appel par route et simule une latence réseau."""
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.last_call = 0.0
+
+    async def request(self, route: str):
+        COUNTERS.api_calls[route] += 1
+        self.last_call = time.perf_counter()
+        if self.latency: await asyncio.sleep(self.latency)
+
+# --- Faux objets Discord (seuls les attributs utilisés par les cogs) ---
+class FakeRole:
+    def __init__(self, guild, managed=False):
+        self.id, self.guild, self.managed = next(_ids), guild, managed
+        self.mention = f"<@&{self.id}>"
+
+class FakeChannel:
+    def __init__(self, guild):
+        self.id, self.guild = next(_ids), guild
+        self.mention = f"<#{self.id}>"
+
+    async def send(self, content=None, embed=None, embeds=None):
+        await self.guild.http.request("POST /channels/{id}/messages")
+
+    async def delete(self, reason=None):
+        await self.guild.http.request("DELETE /channels/{id}")
+        self.guild.channels.pop(self.id, None)
+
+class FakeMember:
+    def __init__(self, guild, bot=False, administrator=False):
+        self.id, self.guild, self.bot = next(_ids), guild, bot
+        self.name = self.display_name = f"user{self.id % 10000}"
+        self.mention = f"<@{self.id}>"
+        self.roles = [guild.default_role]
+        self.activities = ()
+        self.premium_since = None
+        self.created_at = discord.utils.utcnow().replace(year=2020)
+        self.guild_permissions = types.SimpleNamespace(administrator=administrator)
+        self.display_avatar = types.SimpleNamespace(url="https://cdn.discordapp.com/embed/avatars/0.png")
+
+    async def add_roles(self, *roles, reason=None):
+        await self.guild.http.request("PUT /guilds/{id}/members/{id}/roles/{id}")
+        self.roles.extend(r for r in roles if r not in self.roles)
+
+    async def remove_roles(self, *roles, reason=None):
+        await self.guild.http.request("DELETE /guilds/{id}/members/{id}/roles/{id}")
+        self.roles = [r for r in self.roles if r not in roles]
+
+    async def edit(self, roles=None, reason=None):
+        await self.guild.http.request("PATCH /guilds/{id}/members/{id}")
+        if roles is not None: self.roles = [self.guild.default_role, *roles]
+
+    async def kick(self, reason=None):
+        await self.guild.kick(self, reason=reason)
+
+class FakeUser:
+    """Auteur d'une entrée d'audit qui n'est plus membre (banni, expulsé) : comme discord.User, sans .guild."""
+    def __init__(self, member):
+        self.id, self.bot, self.name, self.display_name = member.id, member.bot, member.name, member.display_name
+        self.mention, self.display_avatar = member.mention, member.display_avatar
+
+class FakeMessage:
+    def __init__(self, channel, author, content="hello"):
+        self.id, self.channel, self.author, self.content = next(_ids), channel, author, content
+        self.guild = channel.guild
+        self.jump_url = f"https://discord.com/channels/{self.guild.id}/{channel.id}/{self.id}"
+
+    async def add_reaction(self, emoji):
+        await self.guild.http.request("PUT /channels/{id}/messages/{id}/reactions/{emoji}/@me")
+
+class FakeGuild:
+    def __init__(self, http: FakeHTTP):
+        self.id, self.http = next(_ids), http
+        self.name = "Serveur de test"
+        self.default_role = FakeRole(self)
+        self.owner_id = 0
+        self.members_by_id, self.channels, self.roles = {}, {}, {}
+        self.audit = [] # entrées du journal d'audit, de la plus ancienne à la plus récente
+
+    @property
+    def members(self): return list(self.members_by_id.values())
+    @property
+    def member_count(self): return len(self.members_by_id)
+
+    def get_member(self, member_id): return self.members_by_id.get(member_id)
+    def get_channel(self, channel_id): return self.channels.get(channel_id)
+    def get_role(self, role_id): return self.roles.get(role_id)
+
+    def add_member(self, **kwargs):
+        member = FakeMember(self, **kwargs)
+        self.members_by_id[member.id] = member
+        return member
+
+    def add_channel(self):
+        channel = FakeChannel(self)
+        self.channels[channel.id] = channel
+        return channel
+
+    def add_role(self):
+        role = FakeRole(self)
+        self.roles[role.id] = role
+        return role
+
+    def log_audit(self, action, user, target):
+        self.audit.append(types.SimpleNamespace(id=next(_ids), action=action, user=user, target=target, created_at=discord.utils.utcnow()))
+
+    async def audit_logs(self, limit=100, action=None):
+        await self.http.request("GET /guilds/{id}/audit-logs")
+        found = 0
+        for entry in reversed(self.audit):
+            if found == limit: break
+            if action is None or entry.action == action:
+                found += 1
+                # Comme py-cord : l'auteur est `guild.get_member(id) or User`, il n'est plus un Member une fois parti
+                user = self.get_member(entry.user.id) or FakeUser(entry.user)
+                yield types.SimpleNamespace(id=entry.id, action=entry.action, user=user, target=entry.target, created_at=entry.created_at)
+
+    async def ban(self, user, reason=None):
+        await self.http.request("PUT /guilds/{id}/bans/{id}")
+        self.members_by_id.pop(user.id, None)
+
+    async def unban(self, user, reason=None):
+        await self.http.request("DELETE /guilds/{id}/bans/{id}")
+
+    async def kick(self, user, reason=None):
+        await self.http.request("DELETE /guilds/{id}/members/{id}")
+        self.members_by_id.pop(user.id, None)
+
+class FakeBot:
+    """Distribue les événements aux listeners des cogs comme le ferait discord.Bot.dispatch."""
+    def __init__(self):
+        self.cogs = {}
+        self.listeners = defaultdict(list)
+        self.guilds = []
+        self._ready = asyncio.Event() # jamais levé : les boucles `before_loop` restent en attente
+
+    def add_cog(self, cog):
+        self.cogs[type(cog).__name__] = cog
+        for name, method in cog.get_listeners():
+            self.listeners[name].append(method)
+
+    def get_cog(self, name): return self.cogs.get(name)
+    def get_guild(self, guild_id): return next((g for g in self.guilds if g.id == guild_id), None)
+
+    def get_channel(self, channel_id):
+        for guild in self.guilds:
+            channel = guild.get_channel(channel_id)
+            if channel: return channel
+        return None
+
+    async def wait_until_ready(self):
+        await self._ready.wait()
+
+    async def dispatch(self, event: str, *args):
+        """Renvoie le nombre de listeners ayant levé une exception."""
+        results = await asyncio.gather(*(listener(*args) for listener in self.listeners[f"on_{event}"]), return_exceptions=True)
+        return sum(1 for r in results if isinstance(r, Exception))
+
+# --- Scénarios ---
+# Chaque scénario renvoie les (événement, *arguments) à envoyer, et la cadence en événements/s.
+def scenario_joins(guild, count):
+    """Raid de comptes : 10 000 arrivées par minute (bienvenue + autorole + anti-raid)."""
+    return [("member_join", guild.add_member()) for _ in range(count)], 10000 / 60
+
+def scenario_messages(guild, count):
+    """Flood de messages dans un salon avec 2 réactions automatiques : 1 000 messages/s."""
+    author = guild.add_member()
+    return [("message", FakeMessage(guild.flood_channel, author)) for _ in range(count)], 1000
+
+def scenario_reactions(guild, count):
+    """Réactions en masse : moitié sur un menu de rôles, moitié sur des messages quelconques."""
+    events = []
+    for i in range(count):
+        member = guild.add_member()
+        message_id = guild.menu_message_id if i % 2 else next(_ids)
+        payload = types.SimpleNamespace(guild_id=guild.id, member=member, user_id=member.id, message_id=message_id, emoji="✅")
+        events.append(("raw_reaction_add", payload))
+    return events, 1000
+
+def scenario_channels(guild, count):
+    """Un administrateur compromis crée des salons en masse : 50 salons/s, puis sanction et restauration."""
+    raider = guild.add_member()
+    def events(): # générateur : chaque entrée d'audit apparaît au moment de son événement
+        for _ in range(count):
+            channel = guild.add_channel()
+            guild.log_audit(discord.AuditLogAction.channel_create, raider, channel)
+            yield ("guild_channel_create", channel)
+    return events(), 50
+
+def scenario_deletes(guild, count):
+    """Suppressions de messages en masse, toutes journalisées dans messagelog."""
+    author = guild.add_member()
+    return [("message_delete", FakeMessage(guild.flood_channel, author)) for _ in range(count)], 500
+
+SCENARIOS = {
+    'joins': (scenario_joins, 2000),
+    'messages': (scenario_messages, 2000),
+    'reactions': (scenario_reactions, 2000),
+    'channels': (scenario_channels, 50),
+    'deletes': (scenario_deletes, 1000),
+}
+
+# --- Exécution ---
+IDLE_GRACE = 3.0 # secondes sans appel API avant de considérer les files vides (> fenêtre de bienvenue)
+
+async def setup_environment(latency: float):
+    bot = FakeBot()
+    guild = FakeGuild(FakeHTTP(latency))
+    bot.guilds.append(guild)
+
+    log_channel, welcome_channel = guild.add_channel(), guild.add_channel()
+    guild.flood_channel = guild.add_channel()
+    autorole, menu_role = guild.add_role(), guild.add_role()
+    guild.menu_message_id = next(_ids)
+
+    await db.setup_database()
+    COUNTERS.db_queries = 0
+    for name, value in (('welcome_channel_id', welcome_channel.id), ('leave_channel_id', welcome_channel.id),
+                        ('autorole_id', autorole.id), ('antichannel_on', 1),
+                        ('antichannel_punishment', 'ban'), ('raidlog_channel_id', log_channel.id),
+                        ('messagelog_channel_id', log_channel.id)):
+        await db.set_guild_setting(guild.id, name, value)
+    for emoji in ("👍", "🔥"):
+        await db.add_autoreact(guild.id, guild.flood_channel.id, emoji)
+    await db.add_reaction_role(guild.id, guild.menu_message_id, "✅", menu_role.id)
+
+    for cog in (AntiRaid(bot), Automation(bot), Logs(bot)):
+        bot.add_cog(cog)
+    print(f"Configuration : {COUNTERS.db_queries} requête(s) SQL, latence API simulée {latency * 1000:.0f} ms")
+    return bot, guild
+
+def percentile(sorted_values, p):
+    if not sorted_values: return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))]
+
+async def run_scenario(bot, guild, name, scale):
+    builder, base_count = SCENARIOS[name]
+    events, rate = builder(guild, max(1, int(base_count * scale)))
+    background = len(asyncio.all_tasks())
+    COUNTERS.db_queries, COUNTERS.api_calls = 0, Counter()
+    latencies, errors = [], 0
+
+    async def timed(event, *args):
+        nonlocal errors
+        start = time.perf_counter()
+        errors += await bot.dispatch(event, *args)
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    tasks = []
+    for i, (event, *args) in enumerate(events):
+        delay = start + i / rate - time.perf_counter()
+        if delay > 0: await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(timed(event, *args)))
+    await asyncio.gather(*tasks)
+    sent = time.perf_counter() - start
+
+    # Attend que les files de fond (bienvenues groupées, autoroles, restaurations...) se vident.
+    # Certains workers restent en vie une fois créés : on considère aussi la file vide
+    # quand plus aucun appel API n'a eu lieu depuis IDLE_GRACE secondes.
+    while len(asyncio.all_tasks()) > background and time.perf_counter() - guild.http.last_call < IDLE_GRACE:
+        await asyncio.sleep(0.05)
+    drained = max(sent, guild.http.last_call - start)
+
+    latencies.sort()
+    n = len(tasks)
+    return {
+        'scenario': name, 'events': n, 'rate': rate, 'sent_s': sent, 'drain_s': drained, 'errors': errors,
+        'p50_ms': percentile(latencies, 50) * 1000, 'p95_ms': percentile(latencies, 95) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000, 'max_ms': latencies[-1] * 1000,
+        'db_per_event': COUNTERS.db_queries / n, 'api_per_event': sum(COUNTERS.api_calls.values()) / n,
+        'routes': COUNTERS.api_calls.most_common(4),
+    }
+
+def print_report(r):
+    print(f"\n== {r['scenario']} : {r['events']} événements à {r['rate']:.0f}/s "
+          f"(envoyés en {r['sent_s']:.2f}s, files vidées en {r['drain_s']:.2f}s, {r['errors']} erreur(s))")
+    print(f"   latence   p50 {r['p50_ms']:8.2f} ms | p95 {r['p95_ms']:8.2f} ms | p99 {r['p99_ms']:8.2f} ms | max {r['max_ms']:8.2f} ms")
+    print(f"   par événement : {r['db_per_event']:.2f} requête(s) SQL, {r['api_per_event']:.2f} appel(s) API")
+    for route, calls in r['routes']:
+        print(f"      {calls:6d}  {route}")
+
+async def main(args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        try:
+            bot, guild = await setup_environment(args.latency / 1000)
+            for name in args.scenarios or SCENARIOS:
+                print_report(await run_scenario(bot, guild, name, args.scale))
+            for cog in bot.cogs.values():
+                cog.cog_unload()
+        finally:
+            await db.close_database()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Simulation de raid hors ligne sur les listeners des cogs.")
+    parser.add_argument('scenarios', nargs='*', help=f"Scénarios à lancer parmi {', '.join(SCENARIOS)} (tous par défaut)")
+    parser.add_argument('--scale', type=float, default=1.0, help="Multiplicateur du nombre d'événements")
+    parser.add_argument('--latency', type=float, default=20, help="Latence simulée de chaque appel API, en ms")
+    args = parser.parse_args()
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown: parser.error(f"scénario(s) inconnu(s) : {', '.join(sorted(unknown))}")
+    asyncio.run(main(args))
@@ -0,0 +1,45 @@
+# benchmarks/templates.py
+"""
+Coût de rendu d'un message de bienvenue par arrivée : ancien str.format, compilation
+à chaque rendu, et render_template (compilation mise en cache par texte).
+
+    python benchmarks/templates.py
+    python benchmarks/templates.py --joins 500000
+"""
+import argparse
+import os
+import sys
+import timeit
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.join_pipeline import DEFAULT_WELCOME_MESSAGE
+from utils.templates import compile_template, render_template
+
+TEMPLATES = {
+    'défaut': DEFAULT_WELCOME_MESSAGE,
+    'long': "👋 Salut {member.display_name} ({member.mention}, `{member.id}`) ! Tu es le membre n°{server.member_count} "
+            "de **{server.name}**. Lis le règlement et présente-toi, {member.name} !",
+}
+
+def main(args):
+    member = types.SimpleNamespace(mention="<@123456789012345678>", name="nouveau", display_name="Nouveau", id=123456789012345678)
+    server = types.SimpleNamespace(name="Serveur de test", member_count=12345, id=987654321098765432)
+    variants = {
+        'str.format (ancien)': lambda source: source.format(member=member, server=server),
+        'compilation à chaque rendu': lambda source: compile_template(source).render(member, server),
+        'render_template (cache)': lambda source: render_template(source, member, server),
+    }
+    print(f"{args.joins} rendus par mesure, meilleure de {args.repeat}")
+    for name, source in TEMPLATES.items():
+        print(f"\n== modèle {name} : {source!r}")
+        for label, render in variants.items():
+            best = min(timeit.repeat(lambda: render(source), number=args.joins, repeat=args.repeat))
+            print(f"   {label:28s} {best / args.joins * 1e9:8.0f} ns par arrivée")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Coût de rendu des messages de bienvenue par arrivée.")
+    parser.add_argument('--joins', type=int, default=100000, help="Rendus par mesure")
+    parser.add_argument('--repeat', type=int, default=5, help="Nombre de mesures (on garde la meilleure)")
+    main(parser.parse_args())
@@ -10,11 +10,20 @@ async def global_blacklist_check(ctx: discord.ApplicationContext):
     is_user_blacklisted = await database_handler.is_blacklisted(ctx.author.id)
     return not is_user_blacklisted
 
+class Bot(discord.Bot):
+    async def close(self):
+        """Ferme proprement le pool de la base de données et la session des webhooks à l'arrêt du bot."""
+        await super().close()
+        logs_cog = self.get_cog('Logs')
+        if logs_cog:
+            await logs_cog.webhooks.close()
+        await database_handler.close_database()
+
 intents = discord.Intents.all()
 
 # --- MODIFICATION ICI ---
 # Ajout de l'ID de ton serveur pour des mises à jour de commandes instantanées
-bot = discord.Bot(intents=intents, debug_guilds=[1224814536750665888])
+bot = Bot(intents=intents, debug_guilds=[1224814536750665888])
 
 @bot.event
 async def on_ready():
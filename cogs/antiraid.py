@@ -1,57 +1,224 @@
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 from discord.commands import SlashCommandGroup
 import database_handler as db
-import time, asyncio
-from collections import defaultdict, deque
+import asyncio, time
+from collections import OrderedDict, deque
+from dataclasses import dataclass
+from types import MappingProxyType
 from utils.checks import has_command_permission
+from utils.rate_tracker import RateTracker
+from utils.audit_log import AuditLogCorrelator
+from utils.action_queue import ActionQueue
+
+PROTECTIONS = ('antiupdate', 'antichannel', 'antirole', 'antiwebhook', 'antiunban', 'antibot', 'antiban', 'antieveryone', 'antideco')
+DEFAULT_SENSITIVITY = (3, 5) # (limite, fenêtre en secondes) si la sensibilité est absente ou invalide
+PRIORITY_PUNISH, PRIORITY_ROLLBACK = 0, 1 # la sanction passe avant toute restauration
+RAID_DAMAGE_MAX = 100 # actions mémorisées par (membre, protection) pour pouvoir les annuler
+RAID_DAMAGE_KEYS = 1000 # (membre, protection) suivis au maximum (les moins récents sont oubliés)
+RAID_DAMAGE_HORIZON = 3600 # secondes : au-delà, une action n'est plus jamais annulée
+PUNISHED_TTL = 60 # secondes pendant lesquelles les actions d'un membre sanctionné sont annulées directement
+ROLLBACK_ACTIONS = {'antichannel': "Suppression des salons créés", 'antiban': "Débannissement des membres bannis"}
+
+def parse_sensitivity(sensitivity_str) -> tuple:
+    """'3/10s' -> (3, 10)"""
+    try:
+        limit, seconds = map(int, sensitivity_str.replace('s', '').split('/'))
+        return (limit, seconds)
+    except (ValueError, AttributeError):
+        return DEFAULT_SENSITIVITY
+
+@dataclass(frozen=True, slots=True)
+class ProtectionRule:
+    on: bool
+    limit: int
+    window: int
+    punishment: str
+
+@dataclass(frozen=True, slots=True)
+class AntiRaidPolicy:
+    """Configuration anti-raid d'un serveur, pré-analysée et immuable."""
+    rules: MappingProxyType # {protection: ProtectionRule}
+    whitelist: frozenset
+    creation_limit_seconds: int
 
 class AntiRaid(commands.Cog):
     """Système de protection avancé contre les raids."""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        # Structure: {guild_id: {user_id: {action_type: deque([timestamps])}}}
-        self.action_tracker = defaultdict(lambda: defaultdict(lambda: defaultdict(lambda: deque(maxlen=15))))
+        # Compteurs (serveur, membre, action) bornés en mémoire et purgés quand ils sont inactifs
+        self.action_tracker = RateTracker()
+        self.policies = {} # {guild_id: AntiRaidPolicy}, reconstruit quand /secur modifie la config
+        self._policy_generation = {} # {guild_id: compteur}, incrémenté à chaque invalidation
+        self._policy_builds = {} # {guild_id: asyncio.Task}, construction en cours partagée par les appels concurrents
+        # Journal d'audit partagé : une requête par lot d'événements au lieu d'une par événement
+        self.audit_log = AuditLogCorrelator()
+        # Sanctions et restaurations passent par une file à priorité à concurrence bornée
+        self.action_queue = ActionQueue()
+        self.raid_damage = OrderedDict() # {(guild_id, user_id, action_type): deque([(target_id, instant)])}
+        self.punished = {} # {(guild_id, user_id): instant de la sanction}
+        self.sweep_action_tracker.start()
+
+    def cog_unload(self):
+        self.sweep_action_tracker.cancel()
+        for build in self._policy_builds.values():
+            build.cancel()
+        self.audit_log.close()
+        self.action_queue.close()
+
+    @tasks.loop(minutes=5)
+    async def sweep_action_tracker(self):
+        self.action_tracker.sweep_all()
+        now = time.monotonic()
+        for key in [k for k, damage in self.raid_damage.items() if now - damage[-1][1] > RAID_DAMAGE_HORIZON]:
+            del self.raid_damage[key]
 
     # --- Fonctions internes (le cerveau du système) ---
-    async def _is_immune(self, member: discord.Member) -> bool:
-        if member.id == member.guild.owner_id or member.guild_permissions.administrator:
+    async def get_policy(self, guild_id: int) -> AntiRaidPolicy:
+        policy = self.policies.get(guild_id)
+        if policy: return policy
+        # Cache froid (démarrage, /secur) pendant un raid : une seule lecture en base pour tous les événements
+        build = self._policy_builds.get(guild_id)
+        if build is None:
+            build = self._policy_builds[guild_id] = asyncio.create_task(self._build_policy(guild_id))
+            build.add_done_callback(lambda task: self._forget_policy_build(guild_id, task))
+        # shield : l'annulation d'un des appelants n'interrompt pas la lecture des autres
+        return await asyncio.shield(build)
+
+    def _forget_policy_build(self, guild_id: int, build: asyncio.Task):
+        # Une invalidation a pu lancer une nouvelle construction entre-temps : on ne retire que la nôtre
+        if self._policy_builds.get(guild_id) is build:
+            del self._policy_builds[guild_id]
+
+    async def _build_policy(self, guild_id: int) -> AntiRaidPolicy:
+        generation = self._policy_generation.get(guild_id, 0)
+        settings = await db.get_guild_settings(guild_id)
+        rules = {}
+        for name in PROTECTIONS:
+            limit, window = parse_sensitivity(getattr(settings, f"{name}_sensitivity", None))
+            rules[name] = ProtectionRule(bool(getattr(settings, f"{name}_on")), limit, window, getattr(settings, f"{name}_punishment"))
+        policy = AntiRaidPolicy(MappingProxyType(rules), frozenset(await db.get_whitelist(guild_id)), settings.creation_limit_seconds or 0)
+        # On ne met en cache que si aucune modification n'a eu lieu pendant la lecture
+        if self._policy_generation.get(guild_id, 0) == generation:
+            self.policies[guild_id] = policy
+        return policy
+
+    def invalidate_policy(self, guild_id: int):
+        self.policies.pop(guild_id, None)
+        self._policy_builds.pop(guild_id, None) # les appels suivants relisent la nouvelle configuration
+        self._policy_generation[guild_id] = self._policy_generation.get(guild_id, 0) + 1
+
+    def _is_immune(self, guild: discord.Guild, user: discord.abc.User, policy: AntiRaidPolicy) -> bool:
+        if user.id == guild.owner_id or user.id in policy.whitelist:
             return True
-        return await db.is_whitelisted(member.guild.id, member.id)
+        # L'auteur d'une entrée d'audit n'est un Member que s'il est encore sur le serveur
+        member = guild.get_member(user.id)
+        return bool(member and member.guild_permissions.administrator)
 
-    async def _process_raid_action(self, member: discord.Member, action_type: str):
-        if await self._is_immune(member): return False
-        
-        is_on = await db.get_guild_setting(member.guild.id, f"{action_type}_on")
-        if not is_on: return False
+    async def _process_raid_action(self, guild: discord.Guild, user: discord.abc.User, action_type: str, target_id: int = None):
+        """
+        `user` est l'auteur de l'entrée d'audit : un Member, ou un simple User s'il a déjà été banni ou expulsé.
+        `target_id` (salon créé, membre banni...) permet d'annuler l'action si le membre est sanctionné.
+        """
+        policy = await self.get_policy(guild.id)
+        rule = policy.rules.get(action_type)
+        if not rule or not rule.on: return False
 
-        sensitivity_str = await db.get_guild_setting(member.guild.id, f"{action_type}_sensitivity")
-        try:
-            limit, seconds = map(int, sensitivity_str.replace('s', '').split('/'))
-        except (ValueError, AttributeError):
-            limit, seconds = (3, 5)
-
-        tracker = self.action_tracker[member.guild.id][member.id][action_type]
-        tracker.append(time.time())
-        while tracker and time.time() - tracker[0] > seconds:
-            tracker.popleft()
-
-        if len(tracker) >= limit:
-            punishment_type = await db.get_guild_setting(member.guild.id, f"{action_type}_punishment")
-            await self._trigger_punishment(member, punishment_type, f"Déclenchement de l'anti-raid ({action_type})")
+        key = (guild.id, user.id)
+        punished_at = self.punished.get(key)
+        if punished_at and time.monotonic() - punished_at < PUNISHED_TTL:
+            # Déjà sanctionné : les actions qui arrivent en retard sont annulées sans attendre
+            if target_id is not None and action_type in ROLLBACK_ACTIONS:
+                future = self.action_queue.submit(PRIORITY_ROLLBACK, lambda: self._rollback(guild, action_type, target_id))
+                future.add_done_callback(self._report_rollback_error)
+            return True
+        if self._is_immune(guild, user, policy): return False
+        if target_id is not None and action_type in ROLLBACK_ACTIONS:
+            self._record_damage((*key, action_type), target_id, rule.window)
+
+        count = self.action_tracker.hit(guild.id, user.id, action_type, rule.limit, rule.window)
+        if count >= rule.limit:
+            await self._trigger_punishment(guild, user, rule.punishment, f"Déclenchement de l'anti-raid ({action_type})", action_type, rule.window)
             return True
         return False
 
-    async def _trigger_punishment(self, member: discord.Member, punishment: str, reason: str):
-        # ... (Logique de punition et de log)
-        pass
+    def _record_damage(self, key, target_id: int, window: float):
+        now = time.monotonic()
+        damage = self.raid_damage.get(key)
+        if damage is None:
+            damage = self.raid_damage[key] = deque(maxlen=RAID_DAMAGE_MAX)
+            if len(self.raid_damage) > RAID_DAMAGE_KEYS:
+                self.raid_damage.popitem(last=False)
+        else:
+            self.raid_damage.move_to_end(key)
+            # Seules les actions de la fenêtre en cours font partie du raid
+            while damage and now - damage[0][1] > window:
+                damage.popleft()
+        damage.append((target_id, now))
+
+    @staticmethod
+    def _report_rollback_error(future: asyncio.Future):
+        if future.cancelled(): return
+        error = future.exception()
+        if error: print(f"Erreur lors d'une restauration anti-raid: {error}")
+
+    async def _trigger_punishment(self, guild: discord.Guild, member: discord.abc.User, punishment: str, reason: str, action_type: str = None, window: float = 0):
+        """Sanctionne le membre, puis annule ses actions `action_type` des `window` dernières secondes."""
+        key = (guild.id, member.id)
+        now = time.monotonic()
+        if key in self.punished and now - self.punished[key] < PUNISHED_TTL: return
+        self.punished = {k: t for k, t in self.punished.items() if now - t < PUNISHED_TTL}
+        self.punished[key] = now
+
+        punish = self.action_queue.submit(PRIORITY_PUNISH, lambda: self._punish(guild, member, punishment, reason))
+        damage = self.raid_damage.pop((*key, action_type), ()) if action_type else ()
+        rollbacks = [self.action_queue.submit(PRIORITY_ROLLBACK, lambda t=t: self._rollback(guild, action_type, t))
+                     for t, at in damage if now - at <= window]
+        punish_error = (await asyncio.gather(punish, return_exceptions=True))[0]
+        punish_latency = time.monotonic() - now
+        results = await asyncio.gather(*rollbacks, return_exceptions=True)
+        rollback_latency = time.monotonic() - now
+        failed = sum(1 for r in results if isinstance(r, Exception))
+
+        embed = discord.Embed(title="🛡️ Anti-Raid déclenché", color=discord.Color.red(), timestamp=discord.utils.utcnow())
+        embed.add_field(name="Membre", value=f"{member.mention} (`{member.id}`)", inline=False)
+        embed.add_field(name="Raison", value=reason, inline=False)
+        status = f"❌ Échec ({punish_error})" if isinstance(punish_error, Exception) else "✅"
+        embed.add_field(name="Sanction", value=f"`{punishment}` {status} en {punish_latency * 1000:.0f} ms", inline=False)
+        if rollbacks:
+            embed.add_field(name="Restauration", value=f"{len(rollbacks) - failed}/{len(rollbacks)} action(s) annulée(s) en {rollback_latency * 1000:.0f} ms", inline=False)
+        logs_cog = self.bot.get_cog('Logs')
+        if logs_cog:
+            await logs_cog.send_log(guild.id, "raidlog", embed)
+
+    async def _punish(self, guild: discord.Guild, member, punishment: str, reason: str):
+        if punishment == 'ban':
+            await guild.ban(member, reason=reason)
+        elif punishment == 'kick':
+            await guild.kick(member, reason=reason)
+        else: # derank : on ne garde que les rôles gérés par une intégration (non retirables)
+            member = guild.get_member(member.id)
+            if member:
+                await member.edit(roles=[r for r in member.roles[1:] if r.managed], reason=reason)
+
+    async def _rollback(self, guild: discord.Guild, action_type: str, target_id: int):
+        reason = f"Anti-Raid: {ROLLBACK_ACTIONS[action_type]}"
+        try:
+            if action_type == 'antichannel':
+                channel = guild.get_channel(target_id)
+                if channel: await channel.delete(reason=reason)
+            elif action_type == 'antiban':
+                await guild.unban(discord.Object(id=target_id), reason=reason)
+        except discord.NotFound:
+            pass
 
     # --- Listeners pour chaque protection ---
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         # Anti-Token & Creation Limit
-        creation_limit_seconds = await db.get_guild_setting(member.guild.id, 'creation_limit_seconds')
-        if creation_limit_seconds and creation_limit_seconds > 0:
+        policy = await self.get_policy(member.guild.id)
+        creation_limit_seconds = policy.creation_limit_seconds
+        if creation_limit_seconds > 0:
             account_age = (discord.utils.utcnow() - member.created_at).total_seconds()
             if account_age < creation_limit_seconds:
                 await member.kick(reason=f"Anti-Raid: Compte trop récent (créé il y a {int(account_age/60)} minutes).")
@@ -60,33 +227,29 @@ class AntiRaid(commands.Cog):
         
         # Anti-Bot
         if member.bot:
-            antibot_on = await db.get_guild_setting(member.guild.id, 'antibot_on')
-            if antibot_on:
-                try: # L'audit log peut ne pas être instantané
-                    async for entry in member.guild.audit_logs(limit=5, action=discord.AuditLogAction.bot_add):
-                        if entry.target.id == member.id and not await self._is_immune(entry.user):
-                            punishment = await db.get_guild_setting(member.guild.id, 'antibot_punishment')
-                            await self._trigger_punishment(entry.user, punishment, "Ajout de bot non autorisé")
-                            await member.kick("Anti-Raid: Ajout de bot non autorisé")
-                            break
-                except discord.Forbidden: pass
+            antibot = policy.rules['antibot']
+            if antibot.on:
+                # L'audit log peut ne pas être instantané : le correcteur réessaie pour nous
+                entry = await self.audit_log.resolve(member.guild, discord.AuditLogAction.bot_add, member.id)
+                if entry and not self._is_immune(member.guild, entry.user, policy):
+                    await self._trigger_punishment(member.guild, entry.user, antibot.punishment, "Ajout de bot non autorisé")
+                    try: await member.kick(reason="Anti-Raid: Ajout de bot non autorisé")
+                    except discord.HTTPException: pass
 
     @commands.Cog.listener()
     async def on_guild_channel_create(self, channel):
-        try:
-            async for entry in channel.guild.audit_logs(limit=1, action=discord.AuditLogAction.channel_create):
-                if entry.target.id == channel.id:
-                    if await self._process_raid_action(entry.user, 'antichannel'):
-                        await channel.delete(reason="Anti-Raid: Mass Channel Create")
-        except discord.Forbidden: pass
+        # Protection désactivée : inutile de payer une requête au journal d'audit
+        if not (await self.get_policy(channel.guild.id)).rules['antichannel'].on: return
+        entry = await self.audit_log.resolve(channel.guild, discord.AuditLogAction.channel_create, channel.id)
+        if entry:
+            await self._process_raid_action(channel.guild, entry.user, 'antichannel', channel.id)
         
     @commands.Cog.listener()
     async def on_member_ban(self, guild, user):
-        try:
-            async for entry in guild.audit_logs(limit=1, action=discord.AuditLogAction.ban):
-                if entry.target.id == user.id:
-                    await self._process_raid_action(entry.user, 'antiban')
-        except discord.Forbidden: pass
+        if not (await self.get_policy(guild.id)).rules['antiban'].on: return
+        entry = await self.audit_log.resolve(guild, discord.AuditLogAction.ban, user.id)
+        if entry:
+            await self._process_raid_action(guild, entry.user, 'antiban', user.id)
 
     # ... implémentez les autres listeners (on_guild_role_create, on_message pour antieveryone, etc.) ...
     
@@ -97,6 +260,7 @@ class AntiRaid(commands.Cog):
     @has_command_permission()
     async def secur_set(self, ctx: discord.ApplicationContext, etat: discord.Option(str, "on/off/max", choices=["on", "off", "max"])):
         # ... logique pour activer/désactiver toutes les protections dans la DB ...
+        self.invalidate_policy(ctx.guild.id)
         await ctx.respond(f"✅ Toutes les protections sont maintenant sur `{etat}`.", ephemeral=True)
 
     @secur_group.command(name="punishment", description="Définit une punition pour une protection spécifique.")
@@ -105,6 +269,7 @@ class AntiRaid(commands.Cog):
                          protection: discord.Option(str, "Protection à configurer", choices=["antiban", "antichannel", "..."]),
                          sanction: discord.Option(str, "Punition à appliquer", choices=["kick", "ban", "derank"])):
         await db.set_guild_setting(ctx.guild.id, f"{protection}_punishment", sanction)
+        self.invalidate_policy(ctx.guild.id)
         await ctx.respond(f"✅ La punition pour `{protection}` est maintenant `{sanction}`.", ephemeral=True)
     
     @secur_group.command(name="whitelist", description="Gère la whitelist anti-raid.")
@@ -112,13 +277,18 @@ class AntiRaid(commands.Cog):
     async def whitelist(self, ctx: discord.ApplicationContext,
                         action: discord.Option(str, "Action", choices=["add", "remove"]),
                         membre: discord.Option(discord.Member, "Membre")):
-        # ... logique pour ajouter/retirer de la whitelist ...
+        if action == "add":
+            await db.add_to_whitelist(ctx.guild.id, membre.id)
+        else:
+            await db.remove_from_whitelist(ctx.guild.id, membre.id)
+        self.invalidate_policy(ctx.guild.id)
         await ctx.respond("✅ Opération effectuée.", ephemeral=True)
 
     @secur_group.command(name="creation_limit", description="Définit l'âge minimum de compte pour rejoindre.")
     @has_command_permission()
     async def creation_limit(self, ctx: discord.ApplicationContext, duree: discord.Option(str, "Durée (ex: 30m, 2h, 1d). 0 pour désactiver")):
         # ... logique pour convertir la durée et la stocker dans la DB ...
+        self.invalidate_policy(ctx.guild.id)
         await ctx.respond("✅ Limite d'âge de compte mise à jour.", ephemeral=True)
 
 def setup(bot):
@@ -3,16 +3,27 @@ from discord.ext import commands, tasks
 from discord.commands import SlashCommandGroup
 import database_handler as db
 from utils.checks import has_command_permission
+from utils.join_pipeline import JoinPipeline
+from utils.templates import compile_template, render_template, TemplateError, ALLOWED_FIELDS_HELP
 import asyncio
 
+AUTOREACT_CONCURRENCY = 3 # réactions ajoutées en parallèle au maximum sur un même message
+SUPPORT_RECONCILE_CHUNK = 500 # membres traités avant de rendre la main à la boucle
+
 class Automation(commands.Cog):
     """Commandes d'automatisation et de gestion du serveur."""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        self.supporters = {} # {guild_id: {member_id}} membres ayant actuellement le statut de soutien
+        self.support_reconciles = {} # {guild_id: asyncio.Task}, passes lancées par /soutien
+        self.join_pipeline = JoinPipeline(self._render_welcome)
         self.check_support_roles.start()
 
     def cog_unload(self):
         self.check_support_roles.cancel()
+        self.join_pipeline.close()
+        for task in self.support_reconciles.values():
+            task.cancel()
 
     # --- Groupes de commandes ---
     welcome_group = SlashCommandGroup("welcome", "Configure les messages de bienvenue.")
@@ -26,6 +37,9 @@ class Automation(commands.Cog):
     async def welcome_set(self, ctx: discord.ApplicationContext,
                           salon: discord.Option(discord.TextChannel, "Le salon où envoyer les messages"),
                           message: discord.Option(str, "Message. Utilisez {member.mention} et {server.name}", required=False)):
+        if message:
+            try: compile_template(message)
+            except TemplateError as e: return await ctx.respond(f"❌ {e}. Champs autorisés : {ALLOWED_FIELDS_HELP}", ephemeral=True)
         await db.set_guild_setting(ctx.guild.id, 'welcome_channel_id', salon.id)
         if message:
             await db.set_guild_setting(ctx.guild.id, 'welcome_message', message)
@@ -36,6 +50,9 @@ class Automation(commands.Cog):
     async def goodbye_set(self, ctx: discord.ApplicationContext,
                            salon: discord.Option(discord.TextChannel, "Le salon où envoyer les messages"),
                            message: discord.Option(str, "Message. Utilisez {member.name} et {server.name}", required=False)):
+        if message:
+            try: compile_template(message)
+            except TemplateError as e: return await ctx.respond(f"❌ {e}. Champs autorisés : {ALLOWED_FIELDS_HELP}", ephemeral=True)
         await db.set_guild_setting(ctx.guild.id, 'leave_channel_id', salon.id)
         if message:
             await db.set_guild_setting(ctx.guild.id, 'leave_message', message)
@@ -54,33 +71,24 @@ class Automation(commands.Cog):
     @commands.Cog.listener()
     async def on_member_join(self, member: discord.Member):
         if member.bot: return
-        # Autorole
-        role_id = await db.get_guild_setting(member.guild.id, 'autorole_id')
-        if role_id:
-            role = member.guild.get_role(role_id)
-            if role:
-                try: await member.add_roles(role, reason="Autorole")
-                except discord.Forbidden: print(f"Permissions manquantes pour l'autorole sur le serveur {member.guild.name}")
-        
-        # Message de bienvenue
-        channel_id = await db.get_guild_setting(member.guild.id, 'welcome_channel_id')
-        if channel_id:
-            channel = self.bot.get_channel(channel_id)
-            if channel:
-                welcome_msg_template = await db.get_guild_setting(member.guild.id, 'welcome_message') or "Bienvenue {member.mention} sur **{server.name}** !"
-                message = welcome_msg_template.format(member=member, server=member.guild)
-                try: await channel.send(message)
-                except discord.Forbidden: print(f"Permissions manquantes pour le message de bienvenue sur {member.guild.name}")
+        # Autorole et message de bienvenue passent par le pipeline d'arrivées (regroupement des vagues)
+        settings = await db.get_guild_settings(member.guild.id)
+        if settings.autorole_id or settings.welcome_channel_id:
+            self.join_pipeline.submit(member, settings)
+
+    @staticmethod
+    def _render_welcome(template: str, member: discord.Member) -> str:
+        return render_template(template, member, member.guild)
 
     @commands.Cog.listener()
     async def on_member_remove(self, member: discord.Member):
         if member.bot: return
-        channel_id = await db.get_guild_setting(member.guild.id, 'leave_channel_id')
+        channel_id, leave_msg_template = await db.get_guild_settings(member.guild.id, 'leave_channel_id', 'leave_message')
         if channel_id:
             channel = self.bot.get_channel(channel_id)
             if channel:
-                leave_msg_template = await db.get_guild_setting(member.guild.id, 'leave_message') or "**{member.name}** nous a quitté."
-                message = leave_msg_template.format(member=member, server=member.guild)
+                leave_msg_template = leave_msg_template or "**{member.name}** nous a quitté."
+                message = render_template(leave_msg_template, member, member.guild)
                 try: await channel.send(message)
                 except discord.Forbidden: print(f"Permissions manquantes pour le message de départ sur {member.guild.name}")
 
@@ -93,25 +101,75 @@ class Automation(commands.Cog):
         await db.set_guild_setting(ctx.guild.id, 'support_role_id', role.id)
         await db.set_guild_setting(ctx.guild.id, 'support_message', message)
         await ctx.respond(f"✅ Le rôle de soutien {role.mention} sera donné à ceux qui ont `{message}` dans leur statut.", ephemeral=True)
-        
-    @tasks.loop(minutes=5)
+        # La configuration a changé : on reconstruit l'état de ce serveur (en remplaçant une passe en cours)
+        previous = self.support_reconciles.get(ctx.guild.id)
+        if previous: previous.cancel()
+        task = self.support_reconciles[ctx.guild.id] = asyncio.create_task(self._reconcile_support_roles(ctx.guild))
+        task.add_done_callback(lambda t: self._support_reconcile_done(ctx.guild.id, t))
+
+    def _support_reconcile_done(self, guild_id: int, task: asyncio.Task):
+        if self.support_reconciles.get(guild_id) is task:
+            del self.support_reconciles[guild_id]
+        if task.cancelled(): return
+        error = task.exception()
+        if error: print(f"Erreur lors de la mise à jour des rôles de soutien du serveur {guild_id}: {error}")
+
+    @staticmethod
+    def _has_support_activity(member: discord.Member, support_message: str) -> bool:
+        return any(isinstance(activity, discord.CustomActivity) and support_message in (activity.name or "") for activity in member.activities)
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before: discord.Member, after: discord.Member):
+        if after.bot: return
+        role_id, support_message = await db.get_guild_settings(after.guild.id, 'support_role_id', 'support_message')
+        if not role_id or not support_message: return
+        support_role = after.guild.get_role(role_id)
+        if not support_role: return
+
+        # On n'agit que sur les transitions d'état (début ou fin du statut de soutien)
+        supporters = self.supporters.setdefault(after.guild.id, set())
+        matches = self._has_support_activity(after, support_message)
+        if matches == (after.id in supporters): return
+        try:
+            if matches:
+                supporters.add(after.id)
+                if support_role not in after.roles: await after.add_roles(support_role, reason="Soutien")
+            else:
+                supporters.discard(after.id)
+                if support_role in after.roles: await after.remove_roles(support_role, reason="Soutien retiré")
+        except discord.Forbidden: pass
+
+    async def _reconcile_support_roles(self, guild: discord.Guild):
+        """Passe complète sur un serveur, par paquets, pour rattraper les événements manqués."""
+        role_id, support_message = await db.get_guild_settings(guild.id, 'support_role_id', 'support_message')
+        support_role = guild.get_role(role_id) if role_id and support_message else None
+        if not support_role:
+            self.supporters.pop(guild.id, None)
+            return
+
+        # Mise à jour en place de l'ensemble suivi : les transitions vues par on_presence_update
+        # pendant la passe (entrecoupée d'appels API) ne sont pas écrasées à la fin
+        supporters = self.supporters.setdefault(guild.id, set())
+        for i, member in enumerate(list(guild.members), 1):
+            if i % SUPPORT_RECONCILE_CHUNK == 0:
+                await asyncio.sleep(0) # on rend la main à la boucle entre deux paquets
+            if member.bot: continue
+            try:
+                if self._has_support_activity(member, support_message):
+                    supporters.add(member.id)
+                    if support_role not in member.roles: await member.add_roles(support_role, reason="Soutien")
+                else:
+                    supporters.discard(member.id)
+                    if support_role in member.roles: await member.remove_roles(support_role, reason="Soutien retiré")
+            except discord.Forbidden: continue
+        # Membres partis depuis
+        supporters.difference_update([member_id for member_id in supporters if not guild.get_member(member_id)])
+
+    @tasks.loop(hours=1)
     async def check_support_roles(self):
+        # Réconciliation peu fréquente : le suivi au fil de l'eau est fait par on_presence_update
         for guild in self.bot.guilds:
-            role_id = await db.get_guild_setting(guild.id, 'support_role_id')
-            support_message = await db.get_guild_setting(guild.id, 'support_message')
-            if not role_id or not support_message: continue
-            
-            support_role = guild.get_role(role_id)
-            if not support_role: continue
-
-            for member in guild.members:
-                try:
-                    has_support_activity = any(isinstance(activity, discord.CustomActivity) and support_message in activity.name for activity in member.activities)
-                    if has_support_activity:
-                        if support_role not in member.roles: await member.add_roles(support_role, reason="Soutien")
-                    else:
-                        if support_role in member.roles: await member.remove_roles(support_role, reason="Soutien retiré")
-                except discord.Forbidden: continue
+            await self._reconcile_support_roles(guild)
     
     @check_support_roles.before_loop
     async def before_support_check(self):
@@ -164,14 +222,20 @@ class Automation(commands.Cog):
         if message.author.bot or not message.guild: return
         
         reactions = await db.get_autoreact_for_channel(message.channel.id)
-        for r in reactions:
-            try: await message.add_reaction(r)
-            except: continue
+        if not reactions: return
+        # Limite propre à chaque message : un salon inondé ne retarde pas les autres
+        semaphore = asyncio.Semaphore(AUTOREACT_CONCURRENCY)
+        await asyncio.gather(*(self._add_reaction(message, r, semaphore) for r in reactions))
+
+    async def _add_reaction(self, message: discord.Message, emoji: str, semaphore: asyncio.Semaphore):
+        async with semaphore:
+            try: await message.add_reaction(emoji)
+            except Exception: pass
 
     @commands.Cog.listener()
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent):
         if not payload.guild_id or payload.member.bot: return
-        
+        # Sortie immédiate (en mémoire) si le message n'est pas un menu de rôles
         role_id = await db.get_reaction_role(payload.message_id, str(payload.emoji))
         if role_id:
             role = payload.member.guild.get_role(role_id)
@@ -179,15 +243,15 @@ class Automation(commands.Cog):
 
     @commands.Cog.listener()
     async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent):
+        role_id = await db.get_reaction_role(payload.message_id, str(payload.emoji))
+        if not role_id: return
         guild = self.bot.get_guild(payload.guild_id)
         if not guild: return
         member = guild.get_member(payload.user_id)
         if not member or member.bot: return
         
-        role_id = await db.get_reaction_role(payload.message_id, str(payload.emoji))
-        if role_id:
-            role = guild.get_role(role_id)
-            if role: await member.remove_roles(role, reason="Rôle par réaction")
+        role = guild.get_role(role_id)
+        if role: await member.remove_roles(role, reason="Rôle par réaction")
 
 def setup(bot):
     bot.add_cog(Automation(bot))
\ No newline at end of file
@@ -0,0 +1,221 @@
+import discord
+from discord.ext import commands
+from discord.commands import SlashCommandGroup
+import database_handler as db
+from utils.checks import has_command_permission
+from utils.http_retry import with_retry
+import asyncio, time
+
+JOB_LABELS = {
+    'massadd': "Ajout de rôle en masse",
+    'massremove': "Retrait de rôle en masse",
+    'unbanall': "Débannissement de masse",
+    'moveall': "Déplacement vocal de masse",
+}
+STATUS_LABELS = {
+    'running': "⏳ En cours", 'paused': "⏸️ En pause", 'cancelled': "⛔ Annulée",
+    'done': "✅ Terminée", 'failed': "❌ Échouée",
+}
+PROGRESS_INTERVAL = 5 # secondes entre deux mises à jour du message de progression
+CHECKPOINT_EVERY = 25 # éléments traités entre deux sauvegardes du curseur
+
+class BulkJobs(commands.Cog):
+    """Tâches de masse persistantes (rôles, unbanall, moveall) avec progression et reprise."""
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.workers = {} # {job_id: asyncio.Task}
+        self.stop_requests = {} # {job_id: 'paused' | 'cancelled'}
+
+    def cog_unload(self):
+        # Les tâches restent 'running' en base et seront reprises au prochain démarrage
+        for task in self.workers.values():
+            task.cancel()
+
+    job_group = SlashCommandGroup("job", "Gère les tâches de masse en cours.")
+
+    # --- API utilisée par les autres modules ---
+    async def start_job(self, ctx: discord.ApplicationContext, kind: str, target_id: int, source_id: int = None):
+        """Crée une tâche persistante et lance son worker. Renvoie l'ID de la tâche, ou None s'il n'y a rien à faire."""
+        target_ids = await self._target_ids(ctx.guild, kind, target_id, source_id)
+        if not target_ids: return None
+        job_id = await db.create_bulk_job(ctx.guild.id, ctx.author.id, kind, target_id, source_id, len(target_ids))
+        try:
+            message = await ctx.channel.send(embed=self._progress_embed(job_id, kind, 'running', 0, len(target_ids)))
+            await db.set_bulk_job_message(job_id, ctx.channel.id, message.id)
+        except discord.HTTPException:
+            pass
+        self._spawn(job_id)
+        return job_id
+
+    # --- Worker ---
+    def _spawn(self, job_id: int):
+        if job_id in self.workers: return
+        self.workers[job_id] = asyncio.create_task(self._run_job(job_id))
+
+    async def _target_ids(self, guild: discord.Guild, kind: str, target_id: int, source_id: int):
+        """Liste triée des IDs à traiter : l'ordre stable permet de reprendre grâce au curseur."""
+        if kind == 'massadd':
+            role = guild.get_role(target_id)
+            if not role: return []
+            return sorted(m.id for m in guild.members if not m.bot and role not in m.roles)
+        if kind == 'massremove':
+            role = guild.get_role(target_id)
+            if not role: return []
+            return sorted(m.id for m in role.members if not m.bot)
+        if kind == 'unbanall':
+            return sorted([entry.user.id async for entry in guild.bans(limit=None)])
+        if kind == 'moveall':
+            source = guild.get_channel(source_id)
+            if not source: return []
+            return sorted(m.id for m in source.members)
+        return []
+
+    async def _apply(self, guild: discord.Guild, kind: str, target_id: int, source_id: int, item_id: int, reason: str):
+        if kind == 'unbanall':
+            await guild.unban(discord.Object(id=item_id), reason=reason)
+            return
+        member = guild.get_member(item_id)
+        if not member: return
+        if kind == 'massadd':
+            role = guild.get_role(target_id)
+            if role and role not in member.roles: await member.add_roles(role, reason=reason)
+        elif kind == 'massremove':
+            role = guild.get_role(target_id)
+            if role and role in member.roles: await member.remove_roles(role, reason=reason)
+        elif kind == 'moveall':
+            destination = guild.get_channel(target_id)
+            if destination and member.voice and member.voice.channel and member.voice.channel.id == source_id:
+                await member.move_to(destination, reason=reason)
+
+    async def _run_job(self, job_id: int):
+        try:
+            job = await db.get_bulk_job(job_id)
+            if not job: return
+            _, guild_id, author_id, kind, target_id, source_id, channel_id, message_id, status, last_id, done_count, total, _ = job
+            guild = self.bot.get_guild(guild_id)
+            if not guild:
+                await db.set_bulk_job_status(job_id, 'failed')
+                return
+
+            reason = f"{JOB_LABELS[kind]} (tâche #{job_id}, par {author_id})"
+            remaining = [i for i in await self._target_ids(guild, kind, target_id, source_id) if i > last_id]
+            total = max(total, done_count + len(remaining))
+            status = 'done'
+            last_report = time.monotonic()
+            for processed, item_id in enumerate(remaining, 1):
+                if job_id in self.stop_requests:
+                    status = self.stop_requests.pop(job_id)
+                    break
+                try:
+                    await with_retry(lambda: self._apply(guild, kind, target_id, source_id, item_id, reason))
+                except discord.Forbidden:
+                    # Sans permission, inutile de continuer un unbanall
+                    if kind == 'unbanall':
+                        status = 'failed'
+                        break
+                except discord.NotFound:
+                    pass
+                except discord.HTTPException as e:
+                    # Erreur ponctuelle malgré les nouvelles tentatives : on saute l'élément plutôt que la tâche
+                    print(f"Tâche de masse #{job_id}: élément {item_id} ignoré ({e})")
+                last_id, done_count = item_id, done_count + 1
+                if processed % CHECKPOINT_EVERY == 0:
+                    await db.update_bulk_job_progress(job_id, last_id, done_count)
+                if time.monotonic() - last_report >= PROGRESS_INTERVAL:
+                    await self._update_progress(guild, channel_id, message_id, job_id, kind, 'running', done_count, total)
+                    last_report = time.monotonic()
+
+            await db.update_bulk_job_progress(job_id, last_id, done_count)
+            await db.set_bulk_job_status(job_id, status)
+            await self._update_progress(guild, channel_id, message_id, job_id, kind, status, done_count, total)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # Mise en pause plutôt qu'en échec : le curseur est sauvegardé, /job resume reprend sans risque
+            print(f"Erreur dans la tâche de masse #{job_id}, mise en pause: {e}")
+            await db.set_bulk_job_status(job_id, 'paused')
+        finally:
+            self.workers.pop(job_id, None)
+            self.stop_requests.pop(job_id, None)
+
+    # --- Message de progression ---
+    def _progress_embed(self, job_id, kind, status, done_count, total):
+        percent = int(done_count * 100 / total) if total else 100
+        bar = "█" * (percent // 10) + "░" * (10 - percent // 10)
+        embed = discord.Embed(title=f"{JOB_LABELS[kind]} — tâche #{job_id}", color=discord.Color.blurple())
+        embed.description = f"`{bar}` {percent}%\n**{done_count}/{total}** élément(s) traité(s)"
+        embed.set_footer(text=STATUS_LABELS.get(status, status))
+        return embed
+
+    async def _update_progress(self, guild, channel_id, message_id, job_id, kind, status, done_count, total):
+        if not channel_id or not message_id: return
+        channel = guild.get_channel(channel_id)
+        if not channel: return
+        try:
+            await channel.get_partial_message(message_id).edit(embed=self._progress_embed(job_id, kind, status, done_count, total))
+        except discord.HTTPException:
+            pass
+
+    # --- Reprise au démarrage ---
+    @commands.Cog.listener()
+    async def on_ready(self):
+        for job in await db.get_bulk_jobs(('running',)):
+            self._spawn(job[0])
+
+    # --- Commandes ---
+    async def _get_guild_job(self, ctx, job_id):
+        job = await db.get_bulk_job(job_id)
+        if not job or job[1] != ctx.guild.id:
+            await ctx.respond(f"❌ Aucune tâche `#{job_id}` sur ce serveur.", ephemeral=True)
+            return None
+        return job
+
+    @job_group.command(name="list", description="Affiche les tâches de masse en cours ou en pause.")
+    @has_command_permission()
+    async def job_list(self, ctx: discord.ApplicationContext):
+        jobs = await db.get_bulk_jobs(('running', 'paused'), ctx.guild.id)
+        if not jobs:
+            return await ctx.respond("ℹ️ Aucune tâche de masse en cours.", ephemeral=True)
+        description = "\n".join(f"`#{j[0]}` {JOB_LABELS[j[3]]} — {j[10]}/{j[11]} ({STATUS_LABELS[j[8]]})" for j in jobs)
+        embed = discord.Embed(title="Tâches de masse", description=description, color=discord.Color.blurple())
+        await ctx.respond(embed=embed, ephemeral=True)
+
+    @job_group.command(name="pause", description="Met en pause une tâche de masse.")
+    @has_command_permission()
+    async def job_pause(self, ctx: discord.ApplicationContext, job_id: discord.Option(int, "L'ID de la tâche")):
+        job = await self._get_guild_job(ctx, job_id)
+        if not job: return
+        if job[8] != 'running':
+            return await ctx.respond(f"ℹ️ La tâche `#{job_id}` n'est pas en cours.", ephemeral=True)
+        if job_id in self.workers:
+            self.stop_requests[job_id] = 'paused'
+        else:
+            await db.set_bulk_job_status(job_id, 'paused')
+        await ctx.respond(f"⏸️ La tâche `#{job_id}` va être mise en pause.", ephemeral=True)
+
+    @job_group.command(name="resume", description="Reprend une tâche de masse en pause ou échouée.")
+    @has_command_permission()
+    async def job_resume(self, ctx: discord.ApplicationContext, job_id: discord.Option(int, "L'ID de la tâche")):
+        job = await self._get_guild_job(ctx, job_id)
+        if not job: return
+        if job[8] not in ('paused', 'running', 'failed') or job_id in self.workers:
+            return await ctx.respond(f"ℹ️ La tâche `#{job_id}` ne peut pas être reprise.", ephemeral=True)
+        await db.set_bulk_job_status(job_id, 'running')
+        self._spawn(job_id)
+        await ctx.respond(f"▶️ La tâche `#{job_id}` reprend là où elle s'était arrêtée.", ephemeral=True)
+
+    @job_group.command(name="cancel", description="Annule définitivement une tâche de masse.")
+    @has_command_permission()
+    async def job_cancel(self, ctx: discord.ApplicationContext, job_id: discord.Option(int, "L'ID de la tâche")):
+        job = await self._get_guild_job(ctx, job_id)
+        if not job: return
+        if job[8] not in ('running', 'paused'):
+            return await ctx.respond(f"ℹ️ La tâche `#{job_id}` est déjà terminée.", ephemeral=True)
+        if job_id in self.workers:
+            self.stop_requests[job_id] = 'cancelled'
+        else:
+            await db.set_bulk_job_status(job_id, 'cancelled')
+        await ctx.respond(f"⛔ La tâche `#{job_id}` a été annulée.", ephemeral=True)
+
+def setup(bot):
+    bot.add_cog(BulkJobs(bot))
@@ -2,23 +2,41 @@ import discord
 from discord.ext import commands
 import database_handler as db
 import datetime
+import asyncio
+from utils.checks import has_command_permission
+from utils.log_dispatcher import LogDispatcher
+from utils.webhook_transport import WebhookTransport
 
 class Logs(commands.Cog):
     """Gère tous les journaux d'événements du serveur."""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Les logs sont regroupés (10 embeds par message) pour ne pas saturer le rate-limit des salons
+        self.dispatcher = LogDispatcher(self._deliver)
+        # Transport optionnel (/logswebhook) : rate-limits séparés de ceux des commandes
+        self.webhooks = WebhookTransport(bot)
+
+    def cog_unload(self):
+        self.dispatcher.close()
+        asyncio.create_task(self.webhooks.close())
 
     async def send_log(self, guild_id: int, log_type: str, embed: discord.Embed):
-        """Fonction centralisée pour envoyer un log."""
+        """Fonction centralisée pour envoyer un log (mis en file, envoyé par lots)."""
         channel_id = await db.get_guild_setting(guild_id, f"{log_type}_channel_id")
         if not channel_id: return
-        
-        channel = self.bot.get_channel(channel_id)
-        if channel:
-            try:
-                await channel.send(embed=embed)
-            except discord.Forbidden:
-                print(f"Permissions manquantes pour envoyer des logs dans le salon {channel_id} du serveur {guild_id}")
+        self.dispatcher.submit(guild_id, log_type, embed)
+
+    async def _deliver(self, guild_id: int, log_type: str, embeds: list):
+        # Le salon est relu à l'envoi : la configuration a pu changer pendant l'attente
+        channel_id, use_webhooks = await db.get_guild_settings(guild_id, f"{log_type}_channel_id", 'log_webhooks_on')
+        channel = self.bot.get_channel(channel_id) if channel_id else None
+        if not channel: return
+        # Sans la permission de gérer les webhooks (échec mémorisé), envoi classique
+        if use_webhooks and await self.webhooks.send(channel, embeds): return
+        try:
+            await channel.send(embeds=embeds)
+        except discord.Forbidden:
+            print(f"Permissions manquantes pour envoyer des logs dans le salon {channel_id} du serveur {guild_id}")
 
     # --- Commande de configuration ---
     @commands.slash_command(name="logs", description="Configure les salons de logs.")
@@ -32,6 +50,16 @@ class Logs(commands.Cog):
         else:
             await ctx.respond(f"✅ Les logs de type `{type_de_log}` ont été désactivés.", ephemeral=True)
 
+    @commands.slash_command(name="logswebhook", description="Envoie les logs via des webhooks (nécessite la permission Gérer les webhooks).")
+    @has_command_permission()
+    async def logswebhook(self, ctx: discord.ApplicationContext, etat: discord.Option(str, "on/off", choices=["on", "off"])):
+        await db.set_guild_setting(ctx.guild.id, 'log_webhooks_on', etat == "on")
+        self.webhooks.reset_forbidden(ctx.guild)
+        if etat == "on":
+            await ctx.respond("✅ Les logs seront envoyés via des webhooks.", ephemeral=True)
+        else:
+            await ctx.respond("✅ Les logs seront de nouveau envoyés par le bot.", ephemeral=True)
+
     # --- Listeners ---
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
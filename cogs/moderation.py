@@ -1,9 +1,14 @@
 import discord
 from discord.ext import commands, tasks
 from discord.commands import SlashCommandGroup
-import datetime, re, asyncio
+import datetime, re, asyncio, time
+from collections import defaultdict
 import database_handler as db
 from utils.checks import has_command_permission
+from utils.scheduler import DeadlineScheduler
+
+SANCTION_RETRY_DELAY = 60 # secondes avant de retenter une expiration en échec
+SANCTION_EXPIRY_CONCURRENCY = 5 # appels API simultanés max lors d'un lot d'expirations
 
 def parse_duration(duration_str: str) -> int:
     regex = re.compile(r'(\d+)([smhdwy])')
@@ -19,6 +24,10 @@ class Moderation(commands.Cog):
     """Commandes de modération (kick, ban, warn, etc.)"""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Expiration des sanctions temporaires : tas d'échéances (end_time, sanction_id)
+        self.sanction_scheduler = DeadlineScheduler()
+        self.expiry_stats = {'processed': 0, 'failed': 0, 'last_batch_size': 0, 'last_batch_seconds': 0.0}
+        db.add_sanction_listener(self._schedule_sanction)
         self.check_expired_sanctions.start()
 
     # --- Groupes de commandes pour l'organisation ---
@@ -29,8 +38,17 @@ class Moderation(commands.Cog):
     prison_group = SlashCommandGroup("prison", "Gère le système de prison.")
 
     def cog_unload(self):
+        db.remove_sanction_listener(self._schedule_sanction)
         self.check_expired_sanctions.cancel()
 
+    def _schedule_sanction(self, sanction_id: int, end_time: datetime.datetime):
+        self.sanction_scheduler.schedule(end_time.timestamp(), sanction_id)
+
+    def _retry_sanctions_later(self, sanction_ids):
+        retry_at = self.sanction_scheduler.now() + SANCTION_RETRY_DELAY
+        for sanction_id in sanction_ids:
+            self.sanction_scheduler.schedule(retry_at, sanction_id)
+
     async def log_action(self, ctx, title, color, member, reason, duration=None):
         embed = discord.Embed(title=title, color=color, timestamp=datetime.datetime.now(datetime.timezone.utc))
         embed.add_field(name="Utilisateur", value=f"{member.mention} (`{member.id}`)", inline=False)
@@ -47,40 +65,97 @@ class Moderation(commands.Cog):
         except discord.Forbidden:
             pass
 
-    @tasks.loop(minutes=1)
+    async def _start_bulk_job(self, ctx, kind, target_id, source_id=None):
+        """Délègue une opération de masse au module BulkJobs. Renvoie l'ID de tâche, 0 si rien à faire, None en cas d'erreur."""
+        jobs_cog = self.bot.get_cog('BulkJobs')
+        if not jobs_cog:
+            await ctx.followup.send("❌ Le module des tâches de masse n'est pas chargé.", ephemeral=True)
+            return None
+        return await jobs_cog.start_job(ctx, kind, target_id, source_id) or 0
+
+    @tasks.loop()
     async def check_expired_sanctions(self):
-        expired = await db.get_expired_sanctions()
+        # Dort jusqu'à la prochaine échéance (aucune requête tant que rien n'expire)
+        expired_ids = await self.sanction_scheduler.wait_due()
+        try:
+            await self.process_expired_sanctions(expired_ids)
+        except Exception as e:
+            # Erreur sur le lot entier (ex: base indisponible) : les IDs retirés du tas ne doivent pas être perdus
+            print(f"Erreur lors du traitement des sanctions expirées, nouvel essai dans {SANCTION_RETRY_DELAY}s: {e}")
+            self._retry_sanctions_later(expired_ids)
+
+    async def process_expired_sanctions(self, sanction_ids):
+        """Traite un lot de sanctions expirées en parallèle (concurrence bornée), groupées par serveur."""
+        started = time.perf_counter()
+        expired = await db.get_sanctions_by_ids(sanction_ids)
+        by_guild = defaultdict(list)
         for s in expired:
-            s_id, guild_id, user_id, _, sanc_type, _, _, _, _, role_id_from_db = s
+            by_guild[s[1]].append(s)
+
+        semaphore = asyncio.Semaphore(SANCTION_EXPIRY_CONCURRENCY)
+        done_ids, failed = [], 0
+        async def expire(guild, prison_role, s):
+            nonlocal failed
+            async with semaphore:
+                try:
+                    await self._expire_sanction(guild, prison_role, s)
+                    done_ids.append(s[0])
+                except Exception as e:
+                    failed += 1
+                    print(f"Erreur lors du traitement d'une sanction expirée (ID: {s[0]}): {e}")
+                    # On retentera plus tard, comme l'ancienne boucle de vérification
+                    self._retry_sanctions_later([s[0]])
+
+        jobs = []
+        for guild_id, sanctions in by_guild.items():
             guild = self.bot.get_guild(guild_id)
-            if not guild: continue
-            try:
-                if sanc_type == 'ban':
-                    await guild.unban(discord.Object(id=user_id), reason="Tempban terminé.")
-                else:
-                    member = await guild.fetch_member(user_id)
-                    if sanc_type == 'timeout':
-                        await member.timeout(None, reason="Timeout terminé.")
-                    elif sanc_type == 'temprole' and role_id_from_db:
-                        role_to_remove = guild.get_role(role_id_from_db)
-                        if role_to_remove and role_to_remove in member.roles:
-                            await member.remove_roles(role_to_remove, reason="Temprole terminé.")
-                    elif sanc_type == 'prison':
-                        prison_role_id = await db.get_guild_setting(guild.id, 'prison_role_id')
-                        prison_role = guild.get_role(prison_role_id) if prison_role_id else None
-                        if prison_role and prison_role in member.roles:
-                            await member.remove_roles(prison_role, reason="Fin de la peine de prison.")
-                        original_role_ids = await db.restore_user_roles(guild.id, user_id)
-                        roles_to_restore = [r for r in [guild.get_role(rid) for rid in original_role_ids] if r is not None]
-                        if roles_to_restore:
-                            await member.add_roles(*roles_to_restore, reason="Fin de la peine de prison.")
-                await db.deactivate_sanction(guild_id, user_id, sanc_type)
-            except Exception as e:
-                print(f"Erreur lors du traitement d'une sanction expirée (ID: {s_id}): {e}")
+            if not guild:
+                # Serveur indisponible (panne, cache pas encore prêt) : on retentera plus tard
+                self._retry_sanctions_later([s[0] for s in sanctions])
+                continue
+            # Un seul accès aux paramètres par serveur pour tout le lot
+            prison_role_id = await db.get_guild_setting(guild.id, 'prison_role_id')
+            prison_role = guild.get_role(prison_role_id) if prison_role_id else None
+            jobs.extend(expire(guild, prison_role, s) for s in sanctions)
+        await asyncio.gather(*jobs)
+
+        # Toutes les désactivations dans une seule transaction
+        await db.deactivate_sanctions_by_ids(done_ids)
+
+        elapsed = time.perf_counter() - started
+        self.expiry_stats['processed'] += len(done_ids)
+        self.expiry_stats['failed'] += failed
+        self.expiry_stats['last_batch_size'] = len(expired)
+        self.expiry_stats['last_batch_seconds'] = elapsed
+        if len(expired) > 1:
+            print(f"INFO: {len(done_ids)}/{len(expired)} sanction(s) expirée(s) traitée(s) en {elapsed:.2f}s ({len(expired) / elapsed:.1f}/s).")
+
+    async def _expire_sanction(self, guild: discord.Guild, prison_role, s):
+        _, _, user_id, _, sanc_type, _, _, _, _, role_id_from_db = s
+        if sanc_type == 'ban':
+            await guild.unban(discord.Object(id=user_id), reason="Tempban terminé.")
+            return
+        # On évite l'appel HTTP si le membre est déjà en cache
+        member = guild.get_member(user_id) or await guild.fetch_member(user_id)
+        if sanc_type == 'timeout':
+            await member.timeout(None, reason="Timeout terminé.")
+        elif sanc_type == 'temprole' and role_id_from_db:
+            role_to_remove = guild.get_role(role_id_from_db)
+            if role_to_remove and role_to_remove in member.roles:
+                await member.remove_roles(role_to_remove, reason="Temprole terminé.")
+        elif sanc_type == 'prison':
+            if prison_role and prison_role in member.roles:
+                await member.remove_roles(prison_role, reason="Fin de la peine de prison.")
+            original_role_ids = await db.restore_user_roles(guild.id, user_id)
+            roles_to_restore = [r for r in [guild.get_role(rid) for rid in original_role_ids] if r is not None]
+            if roles_to_restore:
+                await member.add_roles(*roles_to_restore, reason="Fin de la peine de prison.")
 
     @check_expired_sanctions.before_loop
     async def before_check_sanctions(self):
         await self.bot.wait_until_ready()
+        for sanction_id, end_time in await db.get_pending_sanctions():
+            self._schedule_sanction(sanction_id, end_time)
 
     # --- Commandes de Sanctions de base ---
     @commands.slash_command(name="kick", description="Expulse un membre du serveur.")
@@ -117,19 +192,11 @@ class Moderation(commands.Cog):
     @has_command_permission()
     async def unbanall(self, ctx: discord.ApplicationContext):
         await ctx.defer(ephemeral=True)
-        banned_users = await ctx.guild.bans(limit=2000).flatten()
-        if not banned_users:
+        job_id = await self._start_bulk_job(ctx, 'unbanall', None)
+        if job_id is None: return
+        if job_id == 0:
             return await ctx.followup.send("ℹ️ Il n'y a aucun utilisateur banni sur ce serveur.", ephemeral=True)
-        unban_count = 0
-        for ban_entry in banned_users:
-            try:
-                await ctx.guild.unban(ban_entry.user, reason=f"Unbanall par {ctx.author}")
-                unban_count += 1
-                await asyncio.sleep(1)
-            except discord.Forbidden:
-                await ctx.followup.send(f"⚠️ Je n'ai pas pu débannir {ban_entry.user}. Arrêt de l'opération.", ephemeral=True)
-                break
-        await ctx.followup.send(f"✅ {unban_count} utilisateur(s) ont été débannis.", ephemeral=True)
+        await ctx.followup.send(f"✅ Débannissement lancé (tâche `#{job_id}`). Utilisez `/job cancel` pour l'arrêter.", ephemeral=True)
 
     @commands.slash_command(name="timeout", description="Exclut temporairement un membre.")
     @has_command_permission()
@@ -222,15 +289,11 @@ class Moderation(commands.Cog):
         if role >= ctx.author.top_role and ctx.author.id != ctx.guild.owner_id:
             return await ctx.respond("❌ Vous ne pouvez pas gérer un rôle supérieur ou égal au vôtre.", ephemeral=True)
         await ctx.defer(ephemeral=True)
-        count = 0
-        for member in ctx.guild.members:
-            if not member.bot and role not in member.roles:
-                try:
-                    await member.add_roles(role, reason=f"Massrole par {ctx.author}")
-                    count += 1
-                    await asyncio.sleep(0.5)
-                except discord.Forbidden: continue
-        await ctx.followup.send(f"✅ Rôle {role.mention} ajouté à {count} membre(s).", ephemeral=True)
+        job_id = await self._start_bulk_job(ctx, 'massadd', role.id)
+        if job_id is None: return
+        if job_id == 0:
+            return await ctx.followup.send(f"ℹ️ Tous les membres ont déjà le rôle {role.mention}.", ephemeral=True)
+        await ctx.followup.send(f"✅ Ajout du rôle {role.mention} lancé (tâche `#{job_id}`). Utilisez `/job cancel` pour l'arrêter.", ephemeral=True)
 
     @role_group.command(name="massremove", description="[LENT] Retire un rôle à tous les membres qui l'ont.")
     @has_command_permission()
@@ -238,15 +301,11 @@ class Moderation(commands.Cog):
         if role >= ctx.author.top_role and ctx.author.id != ctx.guild.owner_id:
             return await ctx.respond("❌ Vous ne pouvez pas gérer un rôle supérieur ou égal au vôtre.", ephemeral=True)
         await ctx.defer(ephemeral=True)
-        count = 0
-        for member in list(role.members):
-            if not member.bot:
-                try:
-                    await member.remove_roles(role, reason=f"Massrole par {ctx.author}")
-                    count += 1
-                    await asyncio.sleep(0.5)
-                except discord.Forbidden: continue
-        await ctx.followup.send(f"✅ Rôle {role.mention} retiré de {count} membre(s).", ephemeral=True)
+        job_id = await self._start_bulk_job(ctx, 'massremove', role.id)
+        if job_id is None: return
+        if job_id == 0:
+            return await ctx.followup.send(f"ℹ️ Aucun membre n'a le rôle {role.mention}.", ephemeral=True)
+        await ctx.followup.send(f"✅ Retrait du rôle {role.mention} lancé (tâche `#{job_id}`). Utilisez `/job cancel` pour l'arrêter.", ephemeral=True)
 
     # --- Commandes de Gestion de Salons ---
     @channel_group.command(name="clear", description="Supprime un nombre de messages dans ce salon.")
@@ -300,14 +359,11 @@ class Moderation(commands.Cog):
         if not depart.members:
             return await ctx.respond(f"Le salon {depart.mention} est vide.", ephemeral=True)
         await ctx.defer(ephemeral=True)
-        count = 0
-        for member in list(depart.members):
-            try:
-                await member.move_to(arrivee, reason=f"Moveall par {ctx.author}")
-                count += 1
-                await asyncio.sleep(0.5)
-            except discord.Forbidden: continue
-        await ctx.followup.send(f"✅ {count} membre(s) déplacé(s) de {depart.mention} vers {arrivee.mention}.")
+        job_id = await self._start_bulk_job(ctx, 'moveall', arrivee.id, depart.id)
+        if job_id is None: return
+        if job_id == 0:
+            return await ctx.followup.send(f"Le salon {depart.mention} est vide.", ephemeral=True)
+        await ctx.followup.send(f"✅ Déplacement de {depart.mention} vers {arrivee.mention} lancé (tâche `#{job_id}`).", ephemeral=True)
 
 
 def setup(bot):
@@ -2,7 +2,7 @@ import discord
 from discord.ext import commands
 from discord.commands import SlashCommandGroup
 import database_handler as db
-from utils.checks import is_bot_owner
+from utils.checks import is_bot_owner, get_application_owner
 import os
 import sys
 import aiohttp
@@ -118,8 +118,7 @@ class Owner(commands.Cog):
     @owner_group.command(name="list", description="Affiche la liste des propriétaires du bot.")
     @is_bot_owner()
     async def list_owners(self, ctx: discord.ApplicationContext):
-        app_info = await self.bot.application_info()
-        main_owner = app_info.owner
+        main_owner = await get_application_owner(self.bot)
         db_owners_id = await db.get_bot_owners()
         description = f"**Propriétaire Principal :** {main_owner.mention}\n\n**Co-propriétaires :**\n"
         if not db_owners_id:
@@ -28,24 +28,98 @@ STATS_CHANNELS = {
     # },
 }
 
+STATS_RECONCILE_EVERY = 6 # mises à jour entre deux vérifications complètes (6 x 10 min = 1 h)
+
+class _GuildCounters:
+    """Membres en ligne et en vocal d'un serveur, tenus à jour par les événements."""
+    __slots__ = ('online', 'vocal')
+
+    def __init__(self, online, vocal):
+        self.online = online # {member_id} des membres non hors-ligne
+        self.vocal = vocal # {member_id} des membres dans un salon vocal
+
+    @classmethod
+    def scan(cls, guild: discord.Guild):
+        """Calcul complet (O(membres)) : initialisation et réconciliation uniquement."""
+        online = {m.id for m in guild.members if m.status != discord.Status.offline}
+        vocal = {m.id for c in guild.voice_channels for m in c.members}
+        return cls(online, vocal)
+
 class ServerStats(commands.Cog):
     """Gère les statistiques du serveur dans des salons vocaux pré-définis."""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
+        # Compteurs incrémentaux : la mise à jour des salons ne parcourt plus tous les membres
+        self.counters = {} # {guild_id: _GuildCounters}, seulement pour les serveurs de STATS_CHANNELS
+        self.update_count = 0
         self.update_stats_channels.start()
 
     def cog_unload(self):
         self.update_stats_channels.cancel()
 
+    # --- Compteurs incrémentaux ---
+    def _get_counters(self, guild: discord.Guild):
+        counters = self.counters.get(guild.id)
+        if counters is None:
+            counters = self.counters[guild.id] = _GuildCounters.scan(guild)
+        return counters
+
+    def reconcile(self, guild: discord.Guild) -> bool:
+        """Compare les compteurs à un calcul complet et les corrige. Renvoie True s'ils concordaient."""
+        counters = self.counters.get(guild.id)
+        fresh = _GuildCounters.scan(guild)
+        self.counters[guild.id] = fresh
+        if counters is None: return True
+        if counters.online != fresh.online or counters.vocal != fresh.vocal:
+            print(f"WARN: Compteurs de stats désynchronisés sur {guild.name} "
+                  f"(en ligne {len(counters.online)} -> {len(fresh.online)}, vocal {len(counters.vocal)} -> {len(fresh.vocal)})")
+            return False
+        return True
+
+    @commands.Cog.listener()
+    async def on_presence_update(self, before: discord.Member, after: discord.Member):
+        counters = self.counters.get(after.guild.id)
+        if counters is None: return
+        if after.status != discord.Status.offline:
+            counters.online.add(after.id)
+        else:
+            counters.online.discard(after.id)
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member: discord.Member, before: discord.VoiceState, after: discord.VoiceState):
+        counters = self.counters.get(member.guild.id)
+        if counters is None: return
+        # Comme guild.voice_channels : les salons de conférence ne sont pas comptés
+        if isinstance(after.channel, discord.VoiceChannel):
+            counters.vocal.add(member.id)
+        else:
+            counters.vocal.discard(member.id)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        counters = self.counters.get(member.guild.id)
+        if counters is not None and member.status != discord.Status.offline:
+            counters.online.add(member.id)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        counters = self.counters.get(member.guild.id)
+        if counters is None: return
+        counters.online.discard(member.id)
+        counters.vocal.discard(member.id)
+
     @tasks.loop(minutes=10)
     async def update_stats_channels(self):
         print("INFO: Lancement de la mise à jour des statistiques...")
+        self.update_count += 1
         for guild_id, channels in STATS_CHANNELS.items():
             guild = self.bot.get_guild(guild_id)
             if not guild:
                 print(f"WARN: Le bot n'est pas sur le serveur configuré avec l'ID {guild_id}")
                 continue
 
+            if self.update_count % STATS_RECONCILE_EVERY == 0:
+                self.reconcile(guild)
             await self.update_stats_for_guild(guild, channels)
             await asyncio.sleep(2) # Petite pause pour ne pas surcharger l'API
         print("INFO: Mise à jour des statistiques terminée.")
@@ -57,9 +131,10 @@ class ServerStats(commands.Cog):
     async def update_stats_for_guild(self, guild: discord.Guild, channels: dict):
         """Met à jour les noms des salons pour un serveur spécifique."""
         # --- Calcul des stats ---
+        counters = self._get_counters(guild)
         total_members = guild.member_count
-        online_members = sum(1 for m in guild.members if m.status != discord.Status.offline)
-        vocal_members = sum(len(c.members) for c in guild.voice_channels)
+        online_members = len(counters.online)
+        vocal_members = len(counters.vocal)
         boost_count = guild.premium_subscription_count
 
         # --- Noms cibles ---
@@ -1,37 +1,120 @@
 import discord
 from discord.ext import commands
 from discord.commands import SlashCommandGroup
-import datetime
 import io
 from utils.checks import has_command_permission # On importe notre check
+from utils.snipe_store import SnipeStore, SNIPE_HISTORY
+
+PAGE_SIZE = 10
 
 # --- Vue pour la pagination (pour les longues listes) ---
 class PaginatorView(discord.ui.View):
-    def __init__(self, pages, ctx):
+    """
+    Pagination paresseuse : la vue garde la séquence et une fonction de rendu,
+    seule la page affichée est construite (render_page(éléments, total) -> Embed).
+    `search_key(élément) -> str` active la recherche.
+    """
+    def __init__(self, items, render_page, ctx, search_key=None, per_page: int = PAGE_SIZE):
         super().__init__(timeout=120)
-        self.pages = pages
+        self.items = items
+        self.filtered = items
+        self.render_page = render_page
+        self.search_key = search_key
+        self.query = None
+        self.per_page = per_page
         self.current_page = 0
         self.ctx = ctx
+        if not search_key: self.remove_item(self.search_button)
+        self._refresh_buttons()
 
-    async def update_message(self, interaction: discord.Interaction):
+    @property
+    def page_count(self) -> int:
+        return max(1, -(-len(self.filtered) // self.per_page))
+
+    def build_page(self) -> discord.Embed:
+        start = self.current_page * self.per_page
+        embed = self.render_page(self.filtered[start:start + self.per_page], len(self.filtered))
+        footer = f"Page {self.current_page + 1}/{self.page_count}"
+        if self.query: footer += f" • Recherche : {self.query}"
+        return embed.set_footer(text=footer)
+
+    def _refresh_buttons(self):
+        self.previous_button.disabled = self.current_page == 0
+        self.next_button.disabled = self.current_page >= self.page_count - 1
+        self.jump_button.disabled = self.page_count == 1
+
+    async def _check_author(self, interaction: discord.Interaction) -> bool:
         if interaction.user != self.ctx.author:
-            return await interaction.response.send_message("Tu ne peux pas utiliser ces boutons.", ephemeral=True)
-        self.children[0].disabled = self.current_page == 0
-        self.children[1].disabled = self.current_page == len(self.pages) - 1
-        embed = self.pages[self.current_page]
-        embed.set_footer(text=f"Page {self.current_page + 1}/{len(self.pages)}")
-        await interaction.response.edit_message(embed=embed, view=self)
+            await interaction.response.send_message("Tu ne peux pas utiliser ces boutons.", ephemeral=True)
+            return False
+        return True
+
+    async def update_message(self, interaction: discord.Interaction):
+        self._refresh_buttons()
+        await interaction.response.edit_message(embed=self.build_page(), view=self)
+
+    def search(self, query: str) -> bool:
+        """Filtre la liste (recherche vide = tout afficher). Renvoie False si rien ne correspond."""
+        query = query.strip()
+        if not query:
+            self.filtered, self.query = self.items, None
+        else:
+            needle = query.casefold()
+            filtered = [item for item in self.items if needle in self.search_key(item).casefold()]
+            if not filtered: return False
+            self.filtered, self.query = filtered, query
+        self.current_page = 0
+        return True
 
     @discord.ui.button(label="⬅️", style=discord.ButtonStyle.primary, disabled=True)
     async def previous_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        if not await self._check_author(interaction): return
         self.current_page -= 1
         await self.update_message(interaction)
 
     @discord.ui.button(label="➡️", style=discord.ButtonStyle.primary)
     async def next_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        if not await self._check_author(interaction): return
         self.current_page += 1
         await self.update_message(interaction)
 
+    @discord.ui.button(label="🔢", style=discord.ButtonStyle.secondary)
+    async def jump_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        if not await self._check_author(interaction): return
+        await interaction.response.send_modal(JumpToPageModal(self))
+
+    @discord.ui.button(label="🔍", style=discord.ButtonStyle.secondary)
+    async def search_button(self, button: discord.ui.Button, interaction: discord.Interaction):
+        if not await self._check_author(interaction): return
+        await interaction.response.send_modal(SearchModal(self))
+
+class JumpToPageModal(discord.ui.Modal):
+    def __init__(self, view: PaginatorView):
+        super().__init__(title="Aller à la page")
+        self.view = view
+        self.add_item(discord.ui.InputText(label=f"Numéro de page (1-{view.page_count})", max_length=6))
+
+    async def callback(self, interaction: discord.Interaction):
+        try:
+            page = int(self.children[0].value)
+        except ValueError:
+            return await interaction.response.send_message("❌ Numéro de page invalide.", ephemeral=True)
+        if not 1 <= page <= self.view.page_count:
+            return await interaction.response.send_message(f"❌ La page doit être entre 1 et {self.view.page_count}.", ephemeral=True)
+        self.view.current_page = page - 1
+        await self.view.update_message(interaction)
+
+class SearchModal(discord.ui.Modal):
+    def __init__(self, view: PaginatorView):
+        super().__init__(title="Rechercher")
+        self.view = view
+        self.add_item(discord.ui.InputText(label="Nom ou ID (vide pour tout afficher)", required=False, max_length=100))
+
+    async def callback(self, interaction: discord.Interaction):
+        if not self.view.search(self.children[0].value or ""):
+            return await interaction.response.send_message("ℹ️ Aucun résultat pour cette recherche.", ephemeral=True)
+        await self.view.update_message(interaction)
+
 # --- Modal pour créer un Embed ---
 class EmbedCreateModal(discord.ui.Modal):
     def __init__(self, target_channel):
@@ -68,12 +151,45 @@ class Utility(commands.Cog):
     """Commandes utilitaires pour obtenir des informations et plus."""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.sniped_messages = {}
+        self.sniped_messages = SnipeStore() # borné en taille, les entrées expirent après SNIPE_TTL
+        self.member_filters = {} # {guild_id: {filtre: [membres]}}, vidé sur les événements de membres/rôles
+
+    # --- Cache des listes de membres ---
+    def _filtered_members(self, guild: discord.Guild, name: str, compute):
+        """Liste de membres renvoyée par `compute()`, calculée une fois puis gardée en cache."""
+        filters = self.member_filters.setdefault(guild.id, {})
+        members = filters.get(name)
+        if members is None:
+            members = filters[name] = compute()
+        return members
+
+    def _invalidate_member_filters(self, guild: discord.Guild):
+        self.member_filters.pop(guild.id, None)
+
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self._invalidate_member_filters(member.guild)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self._invalidate_member_filters(member.guild)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        if before.roles != after.roles: self._invalidate_member_filters(after.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_update(self, before: discord.Role, after: discord.Role):
+        self._invalidate_member_filters(after.guild)
+
+    @commands.Cog.listener()
+    async def on_guild_role_delete(self, role: discord.Role):
+        self._invalidate_member_filters(role.guild)
 
     @commands.Cog.listener()
     async def on_message_delete(self, message: discord.Message):
         if not message.author.bot and message.content:
-            self.sniped_messages[message.channel.id] = {'content': message.content, 'author': message.author, 'timestamp': datetime.datetime.now(datetime.timezone.utc)}
+            self.sniped_messages.add(message)
 
     # --- Groupes de commandes ---
     server_group = SlashCommandGroup("server", "Affiche des informations sur le serveur.")
@@ -145,18 +261,19 @@ class Utility(commands.Cog):
     @list_group.command(name="rolemembers", description="Affiche les membres ayant un rôle précis.")
     @has_command_permission()
     async def rolemembers(self, ctx: discord.ApplicationContext, role: discord.Option(discord.Role, "Rôle")):
-        await self._send_paginated_list(ctx, role.members, f"Membres avec le rôle @{role.name}", role.color)
+        members = self._filtered_members(ctx.guild, f"role:{role.id}", lambda: role.members)
+        await self._send_paginated_list(ctx, members, f"Membres avec le rôle @{role.name}", role.color)
 
     @list_group.command(name="bots", description="Affiche la liste des bots présents sur le serveur.")
     @has_command_permission()
     async def allbots(self, ctx: discord.ApplicationContext):
-        bots = [m for m in ctx.guild.members if m.bot]
+        bots = self._filtered_members(ctx.guild, "bots", lambda: [m for m in ctx.guild.members if m.bot])
         await self._send_paginated_list(ctx, bots, "Bots sur le serveur")
 
     @list_group.command(name="admins", description="Affiche la liste des administrateurs (humains).")
     @has_command_permission()
     async def alladmins(self, ctx: discord.ApplicationContext):
-        admins = [m for m in ctx.guild.members if not m.bot and m.guild_permissions.administrator]
+        admins = self._filtered_members(ctx.guild, "admins", lambda: [m for m in ctx.guild.members if not m.bot and m.guild_permissions.administrator])
         await self._send_paginated_list(ctx, admins, "Administrateurs sur le serveur", discord.Color.red())
 
     @list_group.command(name="boosters", description="Affiche la liste des membres qui boostent le serveur.")
@@ -180,16 +297,14 @@ class Utility(commands.Cog):
         await ctx.respond(embed=embed)
 
     @commands.slash_command(name="snipe", description="Affiche le dernier message supprimé du salon.")
-    async def snipe(self, ctx: discord.ApplicationContext):
-        if ctx.channel.id in self.sniped_messages:
-            sniped = self.sniped_messages[ctx.channel.id]
-            if (datetime.datetime.now(datetime.timezone.utc) - sniped['timestamp']).total_seconds() > 60:
-                 return await ctx.respond("ℹ️ Pas de message récent à sniper.", ephemeral=True)
-            embed = discord.Embed(description=sniped['content'], color=sniped['author'].color, timestamp=sniped['timestamp'])
-            embed.set_author(name=str(sniped['author']), icon_url=sniped['author'].display_avatar.url)
-            await ctx.respond(embed=embed)
-        else:
-            await ctx.respond("ℹ️ Aucun message à sniper dans ce salon.", ephemeral=True)
+    async def snipe(self, ctx: discord.ApplicationContext,
+                    index: discord.Option(int, "1 = le plus récent", min_value=1, max_value=SNIPE_HISTORY, default=1)):
+        sniped = self.sniped_messages.get(ctx.channel.id, index)
+        if not sniped:
+            return await ctx.respond("ℹ️ Pas de message récent à sniper.", ephemeral=True)
+        embed = discord.Embed(description=sniped.content, color=sniped.color, timestamp=sniped.deleted_at)
+        embed.set_author(name=sniped.author_name, icon_url=sniped.avatar_url)
+        await ctx.respond(embed=embed)
 
     @commands.slash_command(name="embed", description="Affiche un menu pour créer et envoyer un embed.")
     @has_command_permission()
@@ -214,20 +329,13 @@ class Utility(commands.Cog):
         if not member_list:
             return await ctx.respond(f"ℹ️ La liste pour '{title}' est vide.", ephemeral=True)
         
-        pages = []
-        chunk_size = 10 
-        chunks = [member_list[i:i + chunk_size] for i in range(0, len(member_list), chunk_size)]
-        
-        for chunk in chunks:
-            embed = discord.Embed(title=f"{title} ({len(member_list)})", color=color)
+        # Seule la page affichée est construite, à la demande
+        def render_page(chunk, total):
             description = "\n".join(f"{member.mention} (`{member.id}`)" for member in chunk)
-            embed.description = description
-            pages.append(embed)
-            
-        view = PaginatorView(pages, ctx)
-        first_embed = pages[0]
-        first_embed.set_footer(text=f"Page 1/{len(pages)}")
-        await ctx.respond(embed=first_embed, view=view)
+            return discord.Embed(title=f"{title} ({total})", description=description, color=color)
+
+        view = PaginatorView(member_list, render_page, ctx, search_key=lambda m: f"{m.name} {m.display_name} {m.id}")
+        await ctx.respond(embed=view.build_page(), view=view)
 
 def setup(bot):
     bot.add_cog(Utility(bot))
\ No newline at end of file
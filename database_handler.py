@@ -1,12 +1,88 @@
 # database_handler.py
 import aiosqlite
+import asyncio
 import datetime
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, fields, replace
+from typing import Optional
 
 DB_FILE = "bot_v2.db"
+READ_POOL_SIZE = 4
+
+# --- Pool de connexions ---
+# Une seule connexion d'écriture (sérialisée par un verrou) et quelques connexions
+# de lecture réutilisées, au lieu d'ouvrir une connexion (et un thread) par requête.
+_writer_conn = None
+_write_lock = None
+_read_pool = None
+_all_conns = []
+_pool_lock = asyncio.Lock()
+
+# Réglages appliqués à chaque connexion. Le mode WAL (persistant dans le fichier)
+# permet aux lectures de ne pas être bloquées par l'écriture en cours.
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -8000",
+    "PRAGMA temp_store = MEMORY",
+)
+
+async def _connect():
+    conn = await aiosqlite.connect(DB_FILE)
+    for pragma in CONNECTION_PRAGMAS:
+        await conn.execute(pragma)
+    return conn
+
+async def _open_pool():
+    global _writer_conn, _write_lock, _read_pool
+    async with _pool_lock:
+        if _writer_conn is not None: return
+        writer = await _connect()
+        async with writer.execute("PRAGMA journal_mode = WAL") as cursor:
+            await cursor.fetchone()
+        readers = asyncio.Queue()
+        conns = [writer]
+        for _ in range(READ_POOL_SIZE):
+            conn = await _connect()
+            conns.append(conn)
+            readers.put_nowait(conn)
+        _all_conns[:] = conns
+        _write_lock = asyncio.Lock()
+        _read_pool = readers
+        _writer_conn = writer
+
+async def close_database():
+    """Ferme toutes les connexions du pool (à appeler à l'arrêt du bot)."""
+    global _writer_conn, _write_lock, _read_pool
+    async with _pool_lock:
+        if _writer_conn is None: return
+        for conn in _all_conns:
+            await conn.close()
+        _all_conns.clear()
+        _writer_conn = _write_lock = _read_pool = None
+
+@asynccontextmanager
+async def _reader():
+    if _read_pool is None: await _open_pool()
+    pool = _read_pool
+    conn = await pool.get()
+    try:
+        yield conn
+    finally:
+        pool.put_nowait(conn)
+
+@asynccontextmanager
+async def _writer():
+    if _writer_conn is None: await _open_pool()
+    async with _write_lock:
+        try:
+            yield _writer_conn
+        except BaseException:
+            await _writer_conn.rollback()
+            raise
 
 async def setup_database():
     """Crée TOUTES les tables nécessaires pour le bot V2 si elles n'existent pas."""
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
         # --- PERMISSIONS ---
         await db.execute("""
             CREATE TABLE IF NOT EXISTS permissions (
@@ -119,25 +195,109 @@ async def setup_database():
         # --- OWNER / BOT BLACKLIST ---
         await db.execute("CREATE TABLE IF NOT EXISTS bot_owners (user_id INTEGER PRIMARY KEY)")
         await db.execute("CREATE TABLE IF NOT EXISTS blacklist (user_id INTEGER PRIMARY KEY, reason TEXT)")
+
+        # --- TÂCHES DE MASSE (massadd, massremove, unbanall, moveall) ---
+        await db.execute("""
+            CREATE TABLE IF NOT EXISTS bulk_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                guild_id INTEGER NOT NULL,
+                author_id INTEGER NOT NULL,
+                kind TEXT NOT NULL,
+                target_id INTEGER, -- rôle ou salon d'arrivée
+                source_id INTEGER, -- salon de départ (moveall)
+                channel_id INTEGER, -- message de progression
+                message_id INTEGER,
+                status TEXT NOT NULL DEFAULT 'running', -- running, paused, cancelled, done, failed
+                last_id INTEGER NOT NULL DEFAULT 0, -- curseur : dernier ID traité
+                done_count INTEGER NOT NULL DEFAULT 0,
+                total INTEGER NOT NULL DEFAULT 0,
+                created_at TIMESTAMP NOT NULL
+            )
+        """)
         
         await db.commit()
+        await _run_migrations(db)
+        await _load_settings_columns(db)
+        await _load_blacklist(db)
+        await _load_bot_owners(db)
+        await _load_autoreact_index(db)
+        await _load_reaction_roles(db)
+
+# --- Migrations versionnées ---
+# Chaque entrée est une version du schéma (PRAGMA user_version). On n'ajoute
+# que de nouvelles entrées à la fin, on ne modifie jamais une version déjà publiée.
+MIGRATIONS = [
+    # v1 : index pour les requêtes chaudes
+    (
+        # get_expired_sanctions : index partiel limité aux sanctions actives
+        "CREATE INDEX IF NOT EXISTS idx_sanctions_expiry ON sanctions (end_time) WHERE active = 1",
+        # get_user_sanctions / deactivate_sanction
+        "CREATE INDEX IF NOT EXISTS idx_sanctions_user ON sanctions (guild_id, user_id, sanction_type)",
+        # check_permission_for_role / get_permission_constraint (sans guild_id)
+        "CREATE INDEX IF NOT EXISTS idx_permissions_role_command ON permissions (role_id, command)",
+        # get_autoreact_for_channel (index couvrant)
+        "CREATE INDEX IF NOT EXISTS idx_autoreact_channel ON autoreact (channel_id, emoji)",
+        # store_user_roles / restore_user_roles
+        "CREATE INDEX IF NOT EXISTS idx_prisoned_user ON prisoned_user_roles (guild_id, user_id)",
+    ),
+    # v2 : envoi optionnel des logs par webhook
+    (
+        "ALTER TABLE guild_settings ADD COLUMN log_webhooks_on BOOLEAN DEFAULT 0",
+    ),
+]
+
+async def _run_migrations(db):
+    cursor = await db.execute("PRAGMA user_version")
+    (version,) = await cursor.fetchone()
+    for new_version, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+        for statement in statements:
+            await db.execute(statement)
+        await db.execute(f"PRAGMA user_version = {new_version}")
+        await db.commit()
 
 # --- Fonctions de Permissions ---
+# Index en mémoire par serveur : {guild_id: {role_id: frozenset(commandes)}}.
+# Chargé à la demande, invalidé par grant_permission / revoke_permission.
+_permission_index = {}
+_permission_generation = {}
+
+def _invalidate_permission_index(guild_id):
+    _permission_index.pop(guild_id, None)
+    _permission_generation[guild_id] = _permission_generation.get(guild_id, 0) + 1
+
+async def get_permission_index(guild_id: int):
+    index = _permission_index.get(guild_id)
+    if index is not None: return index
+    generation = _permission_generation.get(guild_id, 0)
+    async with _reader() as db:
+        cursor = await db.execute("SELECT role_id, command FROM permissions WHERE guild_id = ?", (guild_id,))
+        rows = await cursor.fetchall()
+    by_role = {}
+    for role_id, command in rows:
+        by_role.setdefault(role_id, set()).add(command)
+    index = {role_id: frozenset(commands) for role_id, commands in by_role.items()}
+    # On ne met en cache que si aucune modification n'a eu lieu pendant la lecture
+    if _permission_generation.get(guild_id, 0) == generation:
+        _permission_index[guild_id] = index
+    return index
+
 async def grant_permission(guild_id: int, role_id: int, command: str):
-    async with aiosqlite.connect(DB_FILE) as db:
-        try:
+    try:
+        async with _writer() as db:
             await db.execute("INSERT INTO permissions (guild_id, role_id, command) VALUES (?, ?, ?)", (guild_id, role_id, command))
             await db.commit()
-            return True
-        except aiosqlite.IntegrityError: return False
+    except aiosqlite.IntegrityError: return False
+    _invalidate_permission_index(guild_id)
+    return True
 
 async def revoke_permission(guild_id: int, role_id: int, command: str):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
         await db.execute("DELETE FROM permissions WHERE guild_id = ? AND role_id = ? AND command = ?", (guild_id, role_id, command))
         await db.commit()
+    _invalidate_permission_index(guild_id)
 
 async def set_permission_constraint(guild_id: int, role_id: int, command: str, constraint_type: str, value: int):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
         cursor = await db.execute("SELECT id FROM permissions WHERE guild_id = ? AND role_id = ? AND command = ?", (guild_id, role_id, command))
         perm_id_row = await cursor.fetchone()
         if not perm_id_row: return None
@@ -147,63 +307,139 @@ async def set_permission_constraint(guild_id: int, role_id: int, command: str, c
         return True
 
 async def check_permission_for_role(role_id: int, command: str):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _reader() as db:
         cursor = await db.execute("SELECT id FROM permissions WHERE role_id = ? AND command = ?", (role_id, command))
         return await cursor.fetchone() is not None
 
 async def get_permission_constraint(role_id: int, command: str, constraint_type: str):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _reader() as db:
         cursor = await db.execute("SELECT pc.value FROM permission_constraints pc JOIN permissions p ON p.id = pc.permission_id WHERE p.role_id = ? AND p.command = ? AND pc.type = ?", (role_id, command, constraint_type))
         result = await cursor.fetchone()
         return result[0] if result else None
 
 async def get_permissions_for_role(guild_id: int, role_id: int):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _reader() as db:
         cursor = await db.execute("SELECT command FROM permissions WHERE guild_id = ? AND role_id = ?", (guild_id, role_id))
         return [row[0] for row in await cursor.fetchall()]
 
 # --- Fonctions de Sanctions ---
+# Callbacks appelés avec (sanction_id, end_time) à chaque nouvelle sanction temporaire
+# (ex: le planificateur d'expiration du module de modération).
+_sanction_listeners = []
+
+def add_sanction_listener(callback):
+    _sanction_listeners.append(callback)
+
+def remove_sanction_listener(callback):
+    if callback in _sanction_listeners: _sanction_listeners.remove(callback)
+
 async def add_sanction(guild_id, user_id, moderator_id, sanc_type, reason, duration_seconds=None, role_id=None):
     start_time = datetime.datetime.now(datetime.timezone.utc)
     end_time = start_time + datetime.timedelta(seconds=duration_seconds) if duration_seconds else None
-    async with aiosqlite.connect(DB_FILE) as db:
-        await db.execute(
+    async with _writer() as db:
+        cursor = await db.execute(
             "INSERT INTO sanctions (guild_id, user_id, moderator_id, sanction_type, reason, start_time, end_time, active, role_id) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
             (guild_id, user_id, moderator_id, sanc_type, reason, start_time, end_time, True, role_id)
         )
         await db.commit()
+        sanction_id = cursor.lastrowid
+    if end_time:
+        for callback in _sanction_listeners:
+            callback(sanction_id, end_time)
+    return sanction_id
         
 async def delete_sanction_by_id(sanction_id: int):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
         await db.execute("DELETE FROM sanctions WHERE id = ?", (sanction_id,))
         await db.commit()
 
 async def get_user_sanctions(guild_id, user_id):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _reader() as db:
         cursor = await db.execute("SELECT * FROM sanctions WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
         return await cursor.fetchall()
 
 async def deactivate_sanction(guild_id, user_id, sanc_type):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
         await db.execute("UPDATE sanctions SET active = 0 WHERE id = (SELECT id FROM sanctions WHERE guild_id = ? AND user_id = ? AND sanction_type = ? AND active = 1 ORDER BY start_time DESC LIMIT 1)", (guild_id, user_id, sanc_type))
         await db.commit()
 
+async def deactivate_sanctions_by_ids(sanction_ids):
+    if not sanction_ids: return
+    async with _writer() as db:
+        await db.executemany("UPDATE sanctions SET active = 0 WHERE id = ?", [(s_id,) for s_id in sanction_ids])
+        await db.commit()
+
 async def get_expired_sanctions():
     now = datetime.datetime.now(datetime.timezone.utc)
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _reader() as db:
         cursor = await db.execute("SELECT * FROM sanctions WHERE end_time IS NOT NULL AND end_time <= ? AND active = 1", (now,))
         return await cursor.fetchall()
 
+async def get_pending_sanctions():
+    """Renvoie [(id, end_time)] pour toutes les sanctions temporaires encore actives."""
+    async with _reader() as db:
+        cursor = await db.execute("SELECT id, end_time FROM sanctions WHERE end_time IS NOT NULL AND active = 1")
+        return [(row[0], datetime.datetime.fromisoformat(row[1])) for row in await cursor.fetchall()]
+
+async def get_sanctions_by_ids(sanction_ids):
+    if not sanction_ids: return []
+    placeholders = ", ".join("?" * len(sanction_ids))
+    async with _reader() as db:
+        cursor = await db.execute(f"SELECT * FROM sanctions WHERE id IN ({placeholders}) AND active = 1", tuple(sanction_ids))
+        return await cursor.fetchall()
+
+# --- Fonctions de Tâches de masse ---
+async def create_bulk_job(guild_id, author_id, kind, target_id, source_id, total):
+    created_at = datetime.datetime.now(datetime.timezone.utc)
+    async with _writer() as db:
+        cursor = await db.execute(
+            "INSERT INTO bulk_jobs (guild_id, author_id, kind, target_id, source_id, total, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (guild_id, author_id, kind, target_id, source_id, total, created_at)
+        )
+        await db.commit()
+        return cursor.lastrowid
+
+async def set_bulk_job_message(job_id, channel_id, message_id):
+    async with _writer() as db:
+        await db.execute("UPDATE bulk_jobs SET channel_id = ?, message_id = ? WHERE id = ?", (channel_id, message_id, job_id))
+        await db.commit()
+
+async def update_bulk_job_progress(job_id, last_id, done_count):
+    async with _writer() as db:
+        await db.execute("UPDATE bulk_jobs SET last_id = ?, done_count = ? WHERE id = ?", (last_id, done_count, job_id))
+        await db.commit()
+
+async def set_bulk_job_status(job_id, status):
+    async with _writer() as db:
+        await db.execute("UPDATE bulk_jobs SET status = ? WHERE id = ?", (status, job_id))
+        await db.commit()
+
+async def get_bulk_job(job_id):
+    async with _reader() as db:
+        cursor = await db.execute("SELECT * FROM bulk_jobs WHERE id = ?", (job_id,))
+        return await cursor.fetchone()
+
+async def get_bulk_jobs(statuses, guild_id=None):
+    placeholders = ", ".join("?" * len(statuses))
+    query = f"SELECT * FROM bulk_jobs WHERE status IN ({placeholders})"
+    params = tuple(statuses)
+    if guild_id is not None:
+        query += " AND guild_id = ?"
+        params += (guild_id,)
+    async with _reader() as db:
+        cursor = await db.execute(query + " ORDER BY id", params)
+        return await cursor.fetchall()
+
 # --- Fonctions de Prison ---
 async def store_user_roles(guild_id, user_id, roles):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
         await db.execute("DELETE FROM prisoned_user_roles WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
         if roles:
             await db.executemany("INSERT INTO prisoned_user_roles (guild_id, user_id, role_id) VALUES (?, ?, ?)", [(guild_id, user_id, r.id) for r in roles])
         await db.commit()
 
 async def restore_user_roles(guild_id, user_id):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
         cursor = await db.execute("SELECT role_id FROM prisoned_user_roles WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
         role_ids = [row[0] for row in await cursor.fetchall()]
         await db.execute("DELETE FROM prisoned_user_roles WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
@@ -211,96 +447,249 @@ async def restore_user_roles(guild_id, user_id):
         return role_ids
 
 # --- Fonctions d'Automatisation ---
+# Rôles par réaction en mémoire : {(message_id, emoji): role_id}, plus l'ensemble
+# des messages-menus pour écarter en un test les réactions sur les messages ordinaires.
+_reaction_roles = None
+_reaction_menu_ids = set()
+
+async def _load_reaction_roles(db):
+    global _reaction_roles
+    cursor = await db.execute("SELECT message_id, emoji, role_id FROM reaction_roles")
+    rows = await cursor.fetchall()
+    _reaction_roles = {(message_id, emoji): role_id for message_id, emoji, role_id in rows}
+    _reaction_menu_ids.clear()
+    _reaction_menu_ids.update(message_id for message_id, _, _ in rows)
+
 async def add_reaction_role(guild_id, message_id, emoji, role_id):
-    async with aiosqlite.connect(DB_FILE) as db:
-        try:
+    try:
+        async with _writer() as db:
+            if _reaction_roles is None: await _load_reaction_roles(db)
             await db.execute("INSERT INTO reaction_roles (guild_id, message_id, emoji, role_id) VALUES (?, ?, ?, ?)", (guild_id, message_id, emoji, role_id))
             await db.commit()
-            return True
-        except aiosqlite.IntegrityError: return False
+            _reaction_roles[(message_id, emoji)] = role_id
+            _reaction_menu_ids.add(message_id)
+        return True
+    except aiosqlite.IntegrityError: return False
 async def get_reaction_role(message_id, emoji):
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute("SELECT role_id FROM reaction_roles WHERE message_id = ? AND emoji = ?", (message_id, emoji))
-        result = await cursor.fetchone()
-        return result[0] if result else None
+    if _reaction_roles is None:
+        async with _writer() as db:
+            if _reaction_roles is None: await _load_reaction_roles(db)
+    if message_id not in _reaction_menu_ids: return None
+    return _reaction_roles.get((message_id, emoji))
+
+# Index en mémoire des auto-réactions : {channel_id: (emoji, ...)}.
+# Un salon sans auto-réaction n'y figure pas : lookup O(1) sans I/O.
+_autoreact_index = None
+
+async def _load_autoreact_index(db):
+    global _autoreact_index
+    cursor = await db.execute("SELECT channel_id, emoji FROM autoreact ORDER BY id")
+    index = {}
+    for channel_id, emoji in await cursor.fetchall():
+        index[channel_id] = index.get(channel_id, ()) + (emoji,)
+    _autoreact_index = index
+
 async def add_autoreact(guild_id, channel_id, emoji):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
+        if _autoreact_index is None: await _load_autoreact_index(db)
         await db.execute("INSERT INTO autoreact (guild_id, channel_id, emoji) VALUES (?, ?, ?)", (guild_id, channel_id, emoji))
         await db.commit()
+        _autoreact_index[channel_id] = _autoreact_index.get(channel_id, ()) + (emoji,)
 async def remove_autoreact(guild_id, channel_id, emoji):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
+        if _autoreact_index is None: await _load_autoreact_index(db)
         await db.execute("DELETE FROM autoreact WHERE guild_id = ? AND channel_id = ? AND emoji = ?", (guild_id, channel_id, emoji))
         await db.commit()
+        remaining = tuple(e for e in _autoreact_index.get(channel_id, ()) if e != emoji)
+        if remaining: _autoreact_index[channel_id] = remaining
+        else: _autoreact_index.pop(channel_id, None)
 async def get_autoreact_for_channel(channel_id):
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute("SELECT emoji FROM autoreact WHERE channel_id = ?", (channel_id,))
-        return [row[0] for row in await cursor.fetchall()]
+    if _autoreact_index is None:
+        async with _writer() as db:
+            if _autoreact_index is None: await _load_autoreact_index(db)
+    return _autoreact_index.get(channel_id, ())
 
 # --- Fonctions Anti-Raid ---
 async def add_to_whitelist(guild_id, user_id):
-    async with aiosqlite.connect(DB_FILE) as db:
-        try:
+    try:
+        async with _writer() as db:
             await db.execute("INSERT INTO antiraid_whitelist (guild_id, user_id) VALUES (?, ?)", (guild_id, user_id))
             await db.commit()
-            return True
-        except aiosqlite.IntegrityError: return False
+        return True
+    except aiosqlite.IntegrityError: return False
 async def remove_from_whitelist(guild_id, user_id):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
         await db.execute("DELETE FROM antiraid_whitelist WHERE guild_id = ? AND user_id = ?", (guild_id, user_id))
         await db.commit()
 async def get_whitelist(guild_id):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _reader() as db:
         cursor = await db.execute("SELECT user_id FROM antiraid_whitelist WHERE guild_id = ?", (guild_id,))
         return [row[0] for row in await cursor.fetchall()]
 async def is_whitelisted(user_id, guild_id):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _reader() as db:
         cursor = await db.execute("SELECT 1 FROM antiraid_whitelist WHERE user_id = ? AND guild_id = ?", (user_id, guild_id))
         return await cursor.fetchone() is not None
 
 # --- Fonctions Owner & Blacklist ---
+# Copie en mémoire de la table bot_owners, même principe que la blacklist ci-dessous.
+_bot_owners = None
+
+async def _load_bot_owners(db):
+    global _bot_owners
+    cursor = await db.execute("SELECT user_id FROM bot_owners")
+    _bot_owners = {row[0] for row in await cursor.fetchall()}
+
 async def add_bot_owner(user_id):
-    async with aiosqlite.connect(DB_FILE) as db:
-        try:
+    try:
+        async with _writer() as db:
+            if _bot_owners is None: await _load_bot_owners(db)
             await db.execute("INSERT INTO bot_owners (user_id) VALUES (?)", (user_id,))
             await db.commit()
-            return True
-        except aiosqlite.IntegrityError: return False
+            _bot_owners.add(user_id)
+        return True
+    except aiosqlite.IntegrityError: return False
 async def remove_bot_owner(user_id):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
+        if _bot_owners is None: await _load_bot_owners(db)
         await db.execute("DELETE FROM bot_owners WHERE user_id = ?", (user_id,))
         await db.commit()
+        _bot_owners.discard(user_id)
 async def get_bot_owners():
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute("SELECT user_id FROM bot_owners")
-        return [row[0] for row in await cursor.fetchall()]
+    if _bot_owners is None:
+        async with _writer() as db:
+            if _bot_owners is None: await _load_bot_owners(db)
+    return list(_bot_owners)
+
+# Copie en mémoire de la table blacklist, chargée au setup et tenue à jour
+# par add_to_blacklist / remove_from_blacklist (sous le verrou d'écriture).
+_blacklist = None
+
+async def _load_blacklist(db):
+    global _blacklist
+    cursor = await db.execute("SELECT user_id FROM blacklist")
+    _blacklist = {row[0] for row in await cursor.fetchall()}
+
 async def add_to_blacklist(user_id, reason):
-    async with aiosqlite.connect(DB_FILE) as db:
-        try:
+    try:
+        async with _writer() as db:
+            if _blacklist is None: await _load_blacklist(db)
             await db.execute("INSERT INTO blacklist (user_id, reason) VALUES (?, ?)", (user_id, reason))
             await db.commit()
-            return True
-        except aiosqlite.IntegrityError: return False
+            _blacklist.add(user_id)
+        return True
+    except aiosqlite.IntegrityError: return False
 async def remove_from_blacklist(user_id):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
+        if _blacklist is None: await _load_blacklist(db)
         await db.execute("DELETE FROM blacklist WHERE user_id = ?", (user_id,))
         await db.commit()
+        _blacklist.discard(user_id)
 async def is_blacklisted(user_id):
-    async with aiosqlite.connect(DB_FILE) as db:
-        cursor = await db.execute("SELECT 1 FROM blacklist WHERE user_id = ?", (user_id,))
-        return await cursor.fetchone() is not None
+    if _blacklist is None:
+        async with _writer() as db:
+            if _blacklist is None: await _load_blacklist(db)
+    return user_id in _blacklist
 
 # --- Fonctions de Settings ---
-async def get_guild_setting(guild_id, setting_name):
-    async with aiosqlite.connect(DB_FILE) as db:
+@dataclass(frozen=True, slots=True)
+class GuildSettings:
+    """Instantané immuable d'une ligne de guild_settings."""
+    guild_id: int
+    modlog_channel_id: Optional[int] = None
+    raidlog_channel_id: Optional[int] = None
+    messagelog_channel_id: Optional[int] = None
+    voicelog_channel_id: Optional[int] = None
+    rolelog_channel_id: Optional[int] = None
+    boostlog_channel_id: Optional[int] = None
+    log_webhooks_on: bool = False
+
+    raid_ping_role_id: Optional[int] = None
+    creation_limit_seconds: int = 0
+
+    antiupdate_on: bool = False
+    antiupdate_punishment: str = 'kick'
+    antichannel_on: bool = False
+    antichannel_punishment: str = 'kick'
+    antirole_on: bool = False
+    antirole_punishment: str = 'kick'
+    antiwebhook_on: bool = False
+    antiwebhook_punishment: str = 'ban'
+    antiunban_on: bool = False
+    antiunban_punishment: str = 'kick'
+    antibot_on: bool = False
+    antibot_punishment: str = 'kick'
+    antiban_on: bool = False
+    antiban_sensitivity: str = '3/10s'
+    antiban_punishment: str = 'ban'
+    antieveryone_on: bool = False
+    antieveryone_sensitivity: str = '3/10s'
+    antieveryone_punishment: str = 'kick'
+    antideco_on: bool = False
+    antideco_sensitivity: str = '5/10s'
+    antideco_punishment: str = 'kick'
+    blrank_on: bool = False
+
+    welcome_channel_id: Optional[int] = None
+    welcome_message: Optional[str] = None
+    leave_channel_id: Optional[int] = None
+    leave_message: Optional[str] = None
+    autorole_id: Optional[int] = None
+    support_role_id: Optional[int] = None
+    support_message: Optional[str] = None
+    prison_role_id: Optional[int] = None
+    prison_channel_id: Optional[int] = None
+
+_SNAPSHOT_FIELDS = frozenset(f.name for f in fields(GuildSettings))
+
+# Cache write-through des instantanés : {guild_id: GuildSettings}.
+# La liste des colonnes autorisées est lue une seule fois, au setup.
+_settings_columns = None
+_settings_cache = {}
+settings_cache_stats = {'hits': 0, 'misses': 0}
+
+async def _load_settings_columns(db):
+    global _settings_columns
+    cursor = await db.execute("PRAGMA table_info(guild_settings)")
+    _settings_columns = frozenset(row[1] for row in await cursor.fetchall())
+
+async def _get_settings_snapshot(guild_id):
+    snapshot = _settings_cache.get(guild_id)
+    if snapshot is not None:
+        settings_cache_stats['hits'] += 1
+        return snapshot
+    settings_cache_stats['misses'] += 1
+    async with _writer() as db:
+        if _settings_columns is None: await _load_settings_columns(db)
         await db.execute("INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)", (guild_id,))
-        cursor = await db.execute(f"PRAGMA table_info(guild_settings)")
-        columns = [row[1] for row in await cursor.fetchall()]
-        if setting_name not in columns: return None
-        cursor = await db.execute(f"SELECT {setting_name} FROM guild_settings WHERE guild_id = ?", (guild_id,))
-        result = await cursor.fetchone()
-        return result[0] if result else None
+        await db.commit()
+        cursor = await db.execute("SELECT * FROM guild_settings WHERE guild_id = ?", (guild_id,))
+        values = await cursor.fetchone()
+        row = {d[0]: v for d, v in zip(cursor.description, values) if d[0] in _SNAPSHOT_FIELDS}
+        snapshot = GuildSettings(**row)
+        _settings_cache[guild_id] = snapshot
+        return snapshot
+
+async def get_guild_settings(guild_id, *names):
+    """
+    Récupère les paramètres d'un serveur en une seule lecture.
+    Sans `names`, renvoie l'instantané GuildSettings complet ; sinon renvoie
+    un tuple des valeurs demandées, dans l'ordre (None si la colonne n'existe pas).
+    """
+    snapshot = await _get_settings_snapshot(guild_id)
+    if not names: return snapshot
+    return tuple(getattr(snapshot, name, None) for name in names)
+
+async def get_guild_setting(guild_id, setting_name):
+    snapshot = await _get_settings_snapshot(guild_id)
+    return getattr(snapshot, setting_name, None)
 async def set_guild_setting(guild_id, setting_name, value):
-    async with aiosqlite.connect(DB_FILE) as db:
+    async with _writer() as db:
+        if _settings_columns is None: await _load_settings_columns(db)
+        if setting_name not in _settings_columns:
+            raise ValueError(f"Paramètre inconnu: {setting_name}")
         await db.execute("INSERT OR IGNORE INTO guild_settings (guild_id) VALUES (?)", (guild_id,))
         await db.execute(f"UPDATE guild_settings SET {setting_name} = ? WHERE guild_id = ?", (value, guild_id))
-        await db.commit()
\ No newline at end of file
+        await db.commit()
+        snapshot = _settings_cache.get(guild_id)
+        if snapshot is not None and setting_name in _SNAPSHOT_FIELDS:
+            _settings_cache[guild_id] = replace(snapshot, **{setting_name: value})
\ No newline at end of file
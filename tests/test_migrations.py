@@ -0,0 +1,52 @@
+# tests/test_migrations.py
+"""
+Vérifie que les requêtes chaudes utilisent bien les index créés par les migrations :
+une migration future qui supprimerait ou renommerait un index ferait échouer ces tests.
+"""
+import asyncio
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import database_handler as db
+
+# (requête telle qu'écrite dans database_handler, paramètres, index attendu)
+HOT_QUERIES = [
+    ("SELECT * FROM sanctions WHERE end_time IS NOT NULL AND end_time <= ? AND active = 1", (0,), "idx_sanctions_expiry"),
+    ("SELECT id, end_time FROM sanctions WHERE end_time IS NOT NULL AND active = 1", (), "idx_sanctions_expiry"),
+    ("SELECT * FROM sanctions WHERE guild_id = ? AND user_id = ?", (1, 2), "idx_sanctions_user"),
+    ("SELECT id FROM sanctions WHERE guild_id = ? AND user_id = ? AND sanction_type = ? AND active = 1 ORDER BY start_time DESC LIMIT 1", (1, 2, "mute"), "idx_sanctions_user"),
+    ("SELECT id FROM permissions WHERE role_id = ? AND command = ?", (1, "ban"), "idx_permissions_role_command"),
+    ("SELECT pc.value FROM permission_constraints pc JOIN permissions p ON p.id = pc.permission_id WHERE p.role_id = ? AND p.command = ? AND pc.type = ?", (1, "ban", "cooldown"), "idx_permissions_role_command"),
+    ("SELECT emoji FROM autoreact WHERE channel_id = ?", (1,), "idx_autoreact_channel"),
+    ("DELETE FROM autoreact WHERE guild_id = ? AND channel_id = ? AND emoji = ?", (1, 2, "👍"), "idx_autoreact_channel"),
+    ("SELECT role_id FROM prisoned_user_roles WHERE guild_id = ? AND user_id = ?", (1, 2), "idx_prisoned_user"),
+]
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("db") / "test.db")
+    previous, db.DB_FILE = db.DB_FILE, path
+
+    async def setup():
+        await db.setup_database()
+        await db.close_database()
+
+    asyncio.run(setup())
+    conn = sqlite3.connect(path)
+    yield conn
+    conn.close()
+    db.DB_FILE = previous
+
+def test_schema_version(database):
+    (version,) = database.execute("PRAGMA user_version").fetchone()
+    assert version == len(db.MIGRATIONS)
+
+@pytest.mark.parametrize("query, params, index", HOT_QUERIES, ids=[q[2] + ":" + q[0][:40] for q in HOT_QUERIES])
+def test_hot_query_uses_index(database, query, params, index):
+    plan = " | ".join(row[3] for row in database.execute(f"EXPLAIN QUERY PLAN {query}", params))
+    assert f"INDEX {index}" in plan, plan
@@ -0,0 +1,56 @@
+# tests/test_rate_tracker.py
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.rate_tracker import RateTracker
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+def test_counts_within_window():
+    clock = FakeClock()
+    tracker = RateTracker(clock=clock)
+    assert [tracker.hit(1, 42, 'antichannel', 3, 10) for _ in range(3)] == [1, 2, 3]
+    clock.now += 11
+    assert tracker.hit(1, 42, 'antichannel', 3, 10) == 1
+
+def test_million_actor_flood_is_bounded():
+    clock = FakeClock()
+    tracker = RateTracker(max_keys_per_guild=5000, clock=clock)
+    guilds = 10
+    for user_id in range(1_000_000):
+        tracker.hit(user_id % guilds, user_id, 'antichannel', 3, 10)
+        if user_id % 1000 == 0: clock.now += 0.001 # flood dense : tout reste dans la fenêtre
+    # Plafond par serveur respecté, les plus anciens acteurs ont été évincés
+    assert len(tracker) == guilds * 5000
+    assert all(len(keys) == 5000 for keys in tracker._guilds.values())
+    assert tracker.stats['evicted_cap'] > 0
+    # Le plus récent est toujours suivi, le tout premier a été oublié
+    assert tracker.hit(9, 999_999, 'antichannel', 3, 10) == 2
+    assert tracker.hit(0, 0, 'antichannel', 3, 10) == 1
+
+def test_idle_keys_are_swept():
+    clock = FakeClock()
+    tracker = RateTracker(clock=clock)
+    for user_id in range(20_000):
+        tracker.hit(user_id % 4, user_id, 'antiban', 3, 5)
+    assert len(tracker) == 20_000
+    clock.now += 6
+    tracker.sweep_all()
+    assert len(tracker) == 0
+    assert tracker._guilds == {}
+
+def test_per_guild_cap_does_not_evict_other_guilds():
+    clock = FakeClock()
+    tracker = RateTracker(max_keys_per_guild=100, clock=clock)
+    tracker.hit(2, 7, 'antibot', 3, 60)
+    for user_id in range(1000):
+        tracker.hit(1, user_id, 'antibot', 3, 60)
+    assert len(tracker) == 101
+    assert tracker.hit(2, 7, 'antibot', 3, 60) == 2
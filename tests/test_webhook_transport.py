@@ -0,0 +1,82 @@
+# tests/test_webhook_transport.py
+import asyncio
+import os
+import sys
+import types
+
+import discord
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.fake_webhook_server import FakeWebhookServer
+from utils.webhook_transport import WebhookTransport
+
+BOT_USER = types.SimpleNamespace(id=1, display_name="Bot", display_avatar=types.SimpleNamespace(url="https://cdn.discordapp.com/embed/avatars/0.png"))
+EMBEDS = [discord.Embed(title="log")]
+
+def run_with_server(monkeypatch, test):
+    """Lance `test(server, transport)` avec py-cord redirigé vers le faux serveur local."""
+    async def main():
+        server = FakeWebhookServer()
+        await server.start()
+        monkeypatch.setattr(discord.http.Route, 'API_BASE_URL', server.base_url)
+        transport = WebhookTransport(types.SimpleNamespace(user=BOT_USER))
+        try:
+            await test(server, transport)
+        finally:
+            await transport.close()
+            await server.stop()
+    asyncio.run(main())
+
+def test_recreates_deleted_webhook_once(monkeypatch):
+    async def test(server, transport):
+        channel = server.channel(10, BOT_USER)
+        assert await transport.send(channel, EMBEDS)
+        server.delete_webhooks(channel.id)
+        assert await transport.send(channel, EMBEDS)
+        assert transport.stats == {'sent': 2, 'created': 2, 'reused': 0}
+        assert len(server.messages) == 2
+
+        # Webhook introuvable à chaque essai : une seule recréation, puis l'erreur remonte
+        channel = server.channel(11, BOT_USER)
+        monkeypatch.setattr(server, 'create_webhook', lambda channel_id: (999, "invalide"))
+        with pytest.raises(discord.NotFound):
+            await transport.send(channel, EMBEDS)
+        assert channel.api_calls == 4 # (liste + création) x 2
+    run_with_server(monkeypatch, test)
+
+def test_reuses_existing_webhook(monkeypatch):
+    async def test(server, transport):
+        channel = server.channel(10, BOT_USER)
+        server.create_webhook(channel.id)
+        assert await transport.send(channel, EMBEDS)
+        assert transport.stats['reused'] == 1 and transport.stats['created'] == 0
+    run_with_server(monkeypatch, test)
+
+def test_forbidden_is_cached(monkeypatch):
+    async def test(server, transport):
+        channel = server.channel(10, BOT_USER, forbidden=True)
+        for _ in range(5):
+            assert not await transport.send(channel, EMBEDS)
+        assert channel.api_calls == 1
+
+        # /logswebhook réautorise les essais sur le serveur
+        transport.reset_forbidden(types.SimpleNamespace(channels=[channel]))
+        channel.forbidden = False
+        assert await transport.send(channel, EMBEDS)
+        assert channel.api_calls == 3
+    run_with_server(monkeypatch, test)
+
+def test_single_session_is_reused(monkeypatch):
+    async def test(server, transport):
+        channels = [server.channel(10 + i, BOT_USER) for i in range(3)]
+        session = transport.session
+        for i in range(12):
+            assert await transport.send(channels[i % 3], EMBEDS)
+        assert transport.session is session
+        assert all(webhook.session is session for webhook in transport._webhooks.values())
+        assert len(server.messages) == 12
+        # Envois séquentiels : une seule connexion keep-alive vers le serveur
+        assert len(server.peers) == 1
+    run_with_server(monkeypatch, test)
@@ -0,0 +1,55 @@
+# utils/action_queue.py
+import discord
+import asyncio
+import itertools
+from utils.http_retry import with_retry
+
+ACTION_CONCURRENCY = 5 # requêtes en vol simultanément
+
+class ActionQueue:
+    """
+    File d'actions Discord à priorité (plus petit = plus urgent), traitée par un nombre borné de workers.
+    La concurrence bornée évite d'ouvrir des centaines de requêtes d'un coup ; chaque action passe
+    par with_retry (429 et erreurs 5xx réessayés).
+    """
+    def __init__(self, concurrency: int = ACTION_CONCURRENCY):
+        self.concurrency = concurrency
+        self._queue = asyncio.PriorityQueue()
+        self._seq = itertools.count() # départage les actions de même priorité (ordre d'arrivée)
+        self._workers = []
+        self.stats = {'done': 0, 'failed': 0, 'retries': 0}
+
+    def __len__(self):
+        return self._queue.qsize()
+
+    def submit(self, priority: int, action) -> asyncio.Future:
+        """`action` est une fonction sans argument renvoyant une coroutine. Renvoie un Future de son résultat."""
+        if not self._workers:
+            self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((priority, next(self._seq), action, future))
+        return future
+
+    def close(self):
+        for task in self._workers:
+            task.cancel()
+        self._workers = []
+
+    def _count_retry(self, error: discord.HTTPException):
+        self.stats['retries'] += 1
+
+    async def _worker(self):
+        while True:
+            _, _, action, future = await self._queue.get()
+            if future.cancelled(): continue
+            try:
+                result = await with_retry(action, self._count_retry)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                self.stats['failed'] += 1
+                if not future.done(): future.set_exception(e)
+            else:
+                self.stats['done'] += 1
+                if not future.done(): future.set_result(result)
@@ -0,0 +1,123 @@
+# utils/audit_log.py
+import discord
+import asyncio
+import time
+from collections import OrderedDict
+
+AUDIT_LOG_BATCH_DELAY = 0.5 # secondes d'attente pour regrouper les événements avant une requête
+AUDIT_LOG_FETCH_LIMIT = 50 # entrées récupérées par requête
+AUDIT_LOG_RETRIES = 3 # nouvelles requêtes si l'entrée n'est pas encore dans le journal
+AUDIT_LOG_MAX_AGE = 60 # secondes : au-delà, une entrée ne peut plus expliquer un événement en cours
+AUDIT_LOG_CACHE_SIZE = 500 # entrées gardées par serveur
+
+class _GuildAuditState:
+    __slots__ = ('entries', 'waiters', 'fetchers', 'consumed')
+
+    def __init__(self):
+        self.entries = OrderedDict() # {(action, target_id): (entry, instant)}
+        self.waiters = {} # {(action, target_id): [asyncio.Future]}
+        self.fetchers = {} # {action: asyncio.Task}
+        self.consumed = OrderedDict() # {entry_id: None}, entrées déjà attribuées à un événement
+
+class AuditLogCorrelator:
+    """
+    Associe un événement (salon créé, ban, bot ajouté...) à l'entrée du journal d'audit qui l'explique.
+    Au lieu d'une requête par événement, les listeners d'un même serveur attendent ensemble :
+    une seule requête par action récupère un lot d'entrées, mises en cache par (action, cible).
+    Chaque entrée n'explique qu'un seul événement : une fois rendue, elle est consommée et ne
+    peut plus être attribuée à un événement suivant sur la même cible (ex: un second ban).
+    """
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self.guilds = {}
+        self.stats = {'requests': 0, 'resolved': 0, 'cache_hits': 0, 'unresolved': 0}
+
+    def close(self):
+        for state in self.guilds.values():
+            for task in state.fetchers.values():
+                task.cancel()
+        self.guilds.clear()
+
+    async def resolve(self, guild: discord.Guild, action: discord.AuditLogAction, target_id: int, timeout: float = 10):
+        """Renvoie l'entrée d'audit correspondant à l'événement, ou None si elle reste introuvable."""
+        state = self.guilds.get(guild.id)
+        if state is None:
+            state = self.guilds[guild.id] = _GuildAuditState()
+        key = (action, target_id)
+        cached = state.entries.pop(key, None)
+        if cached and self._clock() - cached[1] <= AUDIT_LOG_MAX_AGE:
+            self.stats['cache_hits'] += 1
+            self._consume(state, cached[0])
+            return cached[0]
+
+        future = asyncio.get_running_loop().create_future()
+        state.waiters.setdefault(key, []).append(future)
+        if action not in state.fetchers:
+            state.fetchers[action] = asyncio.create_task(self._fetch(guild, action, state))
+        try:
+            entry = await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            entry = None
+        finally:
+            waiters = state.waiters.get(key)
+            if waiters and future in waiters:
+                waiters.remove(future)
+                if not waiters: del state.waiters[key]
+        if entry is None: self.stats['unresolved'] += 1
+        return entry
+
+    async def _fetch(self, guild: discord.Guild, action, state: _GuildAuditState):
+        # Tant qu'un raid est en cours, ce worker enchaîne les lots ; il s'arrête quand plus
+        # personne n'attend ou après AUDIT_LOG_RETRIES lots consécutifs sans résultat.
+        try:
+            misses = 0
+            while misses < AUDIT_LOG_RETRIES:
+                await asyncio.sleep(AUDIT_LOG_BATCH_DELAY)
+                self.stats['requests'] += 1
+                resolved = self.stats['resolved']
+                now = self._clock()
+                oldest = discord.utils.utcnow().timestamp() - AUDIT_LOG_MAX_AGE
+                batch = []
+                async for entry in guild.audit_logs(limit=AUDIT_LOG_FETCH_LIMIT, action=action):
+                    if entry.created_at.timestamp() < oldest: break
+                    batch.append(entry)
+                # De la plus ancienne à la plus récente : le premier événement en attente reçoit la première entrée
+                for entry in reversed(batch):
+                    target_id = getattr(entry.target, 'id', None)
+                    if target_id is None: continue
+                    self._store(state, (action, target_id), entry, now)
+                if not any(key[0] == action for key in state.waiters): return
+                misses = 0 if self.stats['resolved'] > resolved else misses + 1
+        except discord.HTTPException:
+            # Forbidden ou erreur serveur : personne ne sera résolu par ce lot
+            pass
+        finally:
+            state.fetchers.pop(action, None)
+            for key in [k for k in state.waiters if k[0] == action]:
+                for future in state.waiters.pop(key):
+                    if not future.done(): future.set_result(None)
+
+    def _store(self, state: _GuildAuditState, key, entry, now: float):
+        if entry.id in state.consumed: return
+        waiters = state.waiters.get(key, [])
+        while waiters:
+            future = waiters.pop(0)
+            if future.done(): continue
+            if not waiters: del state.waiters[key]
+            future.set_result(entry)
+            self.stats['resolved'] += 1
+            self._consume(state, entry)
+            return
+        state.waiters.pop(key, None)
+        # Personne n'attend encore cette entrée : l'événement correspondant arrivera peut-être après
+        if key in state.entries:
+            state.entries.move_to_end(key)
+        state.entries[key] = (entry, now)
+        if len(state.entries) > AUDIT_LOG_CACHE_SIZE:
+            state.entries.popitem(last=False)
+
+    @staticmethod
+    def _consume(state: _GuildAuditState, entry):
+        state.consumed[entry.id] = None
+        if len(state.consumed) > AUDIT_LOG_CACHE_SIZE:
+            state.consumed.popitem(last=False)
@@ -2,6 +2,7 @@
 import discord
 from discord.ext import commands
 import database_handler as db
+import time
 
 # --- LISTE DES COMMANDES PUBLIQUES ---
 # Ces commandes seront toujours autorisées pour tout le monde.
@@ -40,11 +41,12 @@ def has_command_permission():
             return True
         
         # Règle 3: L'auteur a-t-il un rôle avec la permission explicite ?
-        for role in reversed(author.roles):
-            # On vérifie si un des rôles a la permission "admin" (passe-partout)
-            # ou la permission pour la commande spécifique.
-            perms = await db.get_permissions_for_role(ctx.guild.id, role.id)
-            if "admin" in perms or command_name in perms:
+        # On vérifie si un des rôles a la permission "admin" (passe-partout)
+        # ou la permission pour la commande spécifique, via l'index en mémoire.
+        index = await db.get_permission_index(ctx.guild.id)
+        wanted = {"admin", command_name}
+        for role_id in index.keys() & {role.id for role in author.roles}:
+            if not wanted.isdisjoint(index[role_id]):
                 return True
         
         # Si aucune des règles ci-dessus n'est remplie, on refuse.
@@ -53,11 +55,25 @@ def has_command_permission():
         
     return commands.check(predicate)
 
+# --- Propriétaire principal (application_info mis en cache) ---
+APP_INFO_TTL = 3600 # secondes avant de redemander application_info à l'API
+_app_owner = None
+_app_owner_expires = 0.0
+
+async def get_application_owner(bot: discord.Bot):
+    """Renvoie le propriétaire de l'application, sans appel HTTP tant que le cache est valide."""
+    global _app_owner, _app_owner_expires
+    if _app_owner is None or time.monotonic() >= _app_owner_expires:
+        app_info = await bot.application_info()
+        _app_owner = app_info.owner
+        _app_owner_expires = time.monotonic() + APP_INFO_TTL
+    return _app_owner
+
 def is_bot_owner():
     """Check pour vérifier si l'auteur est un propriétaire du bot."""
     async def predicate(ctx: discord.ApplicationContext):
-        app_info = await ctx.bot.application_info()
-        if ctx.author.id == app_info.owner.id:
+        app_owner = await get_application_owner(ctx.bot)
+        if ctx.author.id == app_owner.id:
             return True
         db_owners = await db.get_bot_owners()
         if ctx.author.id in db_owners:
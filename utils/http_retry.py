@@ -0,0 +1,26 @@
+# utils/http_retry.py
+import discord
+import asyncio
+
+MAX_RETRIES = 3
+SERVER_ERROR_DELAY = 2 # secondes avant de réessayer après une erreur 5xx de Discord
+
+def retry_delay(error: discord.HTTPException) -> float:
+    if error.status == 429:
+        return float(error.response.headers.get('Retry-After', 1))
+    return SERVER_ERROR_DELAY
+
+async def with_retry(action, on_retry=None):
+    """
+    Exécute `action()` (fonction sans argument renvoyant une coroutine) et réessaie les erreurs passagères.
+    Pas de pause fixe entre deux requêtes : le client HTTP de la librairie suit déjà les en-têtes de
+    rate-limit par bucket. On ne réessaie ici que les 429 qui remontent malgré tout (après Retry-After)
+    et les erreurs serveur 5xx ; toute autre erreur, ou la dernière tentative, est relevée.
+    """
+    for attempt in range(MAX_RETRIES):
+        try:
+            return await action()
+        except discord.HTTPException as e:
+            if (e.status != 429 and e.status < 500) or attempt == MAX_RETRIES - 1: raise
+            if on_retry: on_retry(e)
+            await asyncio.sleep(retry_delay(e))
@@ -0,0 +1,116 @@
+# utils/join_pipeline.py
+import discord
+import asyncio
+import time
+import database_handler as db
+from utils.http_retry import with_retry
+
+WELCOME_BATCH_WINDOW = 2.0 # secondes pendant lesquelles on regroupe les arrivées
+WELCOME_BATCH_MAX = 20 # arrivées max par lot avant envoi immédiat
+MESSAGE_MAX_LENGTH = 2000
+DEFAULT_WELCOME_MESSAGE = "Bienvenue {member.mention} sur **{server.name}** !"
+
+class _GuildJoinState:
+    __slots__ = ('pending_welcome', 'flush_task', 'autorole_queue', 'autorole_worker')
+
+    def __init__(self):
+        self.pending_welcome = [] # [(member, instant d'arrivée)]
+        self.flush_task = None
+        self.autorole_queue = asyncio.Queue()
+        self.autorole_worker = None
+
+class JoinPipeline:
+    """
+    Pipeline d'arrivées par serveur, pour absorber les vagues de joins (raid, invitation massive).
+    - Les messages de bienvenue sont regroupés en un seul message par fenêtre de WELCOME_BATCH_WINDOW.
+    - Les autoroles passent par une file par serveur, traitée une requête à la fois
+      au lieu de centaines d'appels simultanés.
+    """
+    def __init__(self, render_welcome):
+        self.render_welcome = render_welcome # (template, member) -> str
+        self.guilds = {}
+        self.stats = {
+            'joins': 0, 'welcome_batches': 0, 'welcomed': 0, 'autoroles': 0,
+            'max_autorole_queue': 0, 'max_welcome_queue': 0,
+            'last_welcome_latency': 0.0, 'last_autorole_latency': 0.0,
+        }
+
+    def queue_depths(self):
+        """{guild_id: (bienvenues en attente, autoroles en attente)}"""
+        return {gid: (len(s.pending_welcome), s.autorole_queue.qsize()) for gid, s in self.guilds.items()}
+
+    def submit(self, member: discord.Member, settings):
+        """Enregistre une arrivée. `settings` est l'instantané GuildSettings déjà lu par l'appelant."""
+        now = time.monotonic()
+        self.stats['joins'] += 1
+        state = self.guilds.get(member.guild.id)
+        if state is None:
+            state = self.guilds[member.guild.id] = _GuildJoinState()
+
+        if settings.autorole_id:
+            state.autorole_queue.put_nowait((member, settings.autorole_id, now))
+            self.stats['max_autorole_queue'] = max(self.stats['max_autorole_queue'], state.autorole_queue.qsize())
+            if state.autorole_worker is None:
+                state.autorole_worker = asyncio.create_task(self._autorole_worker(member.guild, state))
+
+        if settings.welcome_channel_id:
+            state.pending_welcome.append((member, now))
+            self.stats['max_welcome_queue'] = max(self.stats['max_welcome_queue'], len(state.pending_welcome))
+            if len(state.pending_welcome) == WELCOME_BATCH_MAX:
+                if state.flush_task: state.flush_task.cancel()
+                state.flush_task = asyncio.create_task(self._flush_welcome(member.guild, state))
+            elif state.flush_task is None:
+                state.flush_task = asyncio.create_task(self._flush_welcome(member.guild, state, WELCOME_BATCH_WINDOW))
+
+    def close(self):
+        for state in self.guilds.values():
+            for task in (state.flush_task, state.autorole_worker):
+                if task: task.cancel()
+        self.guilds.clear()
+
+    async def _flush_welcome(self, guild: discord.Guild, state: _GuildJoinState, delay: float = 0):
+        if delay: await asyncio.sleep(delay)
+        batch, state.pending_welcome, state.flush_task = state.pending_welcome, [], None
+        # Les comptes expulsés entre-temps (ex: anti-raid) ne sont pas accueillis
+        batch = [(m, t) for m, t in batch if guild.get_member(m.id)]
+        if not batch: return
+
+        settings = await db.get_guild_settings(guild.id)
+        channel = guild.get_channel(settings.welcome_channel_id) if settings.welcome_channel_id else None
+        if not channel: return
+        template = settings.welcome_message or DEFAULT_WELCOME_MESSAGE
+
+        chunks, current = [], ""
+        for member, _ in batch:
+            line = self.render_welcome(template, member)
+            if current and len(current) + len(line) + 1 > MESSAGE_MAX_LENGTH:
+                chunks.append(current)
+                current = ""
+            current = f"{current}\n{line}" if current else line
+        chunks.append(current)
+        try:
+            for content in chunks:
+                await channel.send(content[:MESSAGE_MAX_LENGTH])
+        except discord.Forbidden:
+            print(f"Permissions manquantes pour le message de bienvenue sur {guild.name}")
+            return
+        self.stats['welcome_batches'] += 1
+        self.stats['welcomed'] += len(batch)
+        self.stats['last_welcome_latency'] = time.monotonic() - batch[0][1]
+
+    async def _autorole_worker(self, guild: discord.Guild, state: _GuildJoinState):
+        try:
+            while not state.autorole_queue.empty():
+                member, role_id, joined = state.autorole_queue.get_nowait()
+                role = guild.get_role(role_id)
+                if not role or not guild.get_member(member.id) or role in member.roles: continue
+                try:
+                    await with_retry(lambda: member.add_roles(role, reason="Autorole"))
+                    self.stats['autoroles'] += 1
+                    self.stats['last_autorole_latency'] = time.monotonic() - joined
+                except discord.Forbidden:
+                    print(f"Permissions manquantes pour l'autorole sur le serveur {guild.name}")
+                except discord.HTTPException as e:
+                    print(f"Erreur lors de l'autorole sur le serveur {guild.name}: {e}")
+        finally:
+            state.autorole_worker = None
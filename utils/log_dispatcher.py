@@ -0,0 +1,92 @@
+# utils/log_dispatcher.py
+import discord
+import asyncio
+from collections import deque
+
+LOG_BATCH_MAX = 10 # embeds max par message (limite de l'API)
+LOG_BATCH_CHARS = 6000 # texte cumulé max de tous les embeds d'un message (limite de l'API)
+LOG_BATCH_WINDOW = 1.0 # secondes d'attente pour compléter un lot avant envoi
+LOG_QUEUE_MAX = 200 # embeds en attente par (serveur, type de log) ; au-delà on jette les plus anciens
+
+class _LogQueue:
+    __slots__ = ('embeds', 'chars', 'full', 'worker')
+
+    def __init__(self):
+        self.embeds = deque()
+        self.chars = 0 # len() cumulé des embeds en attente
+        self.full = asyncio.Event() # levé quand un lot complet est prêt
+        self.worker = None
+
+class LogDispatcher:
+    """
+    File de logs par (serveur, type de log) : les embeds sont regroupés par 10 dans un seul
+    message, envoyé dès que le lot est complet ou après LOG_BATCH_WINDOW secondes.
+    Si le salon n'arrive pas à suivre (rate-limit), la file est bornée et les plus anciens
+    logs sont abandonnés plutôt que de retarder indéfiniment les nouveaux.
+    """
+    def __init__(self, deliver):
+        self.deliver = deliver # async (guild_id, log_type, [embeds]) -> None
+        self.queues = {}
+        self.stats = {'queued': 0, 'sent': 0, 'messages': 0, 'dropped': 0, 'failed': 0}
+
+    def queue_depths(self):
+        """{(guild_id, log_type): embeds en attente}"""
+        return {key: len(q.embeds) for key, q in self.queues.items() if q.embeds}
+
+    def submit(self, guild_id: int, log_type: str, embed: discord.Embed):
+        key = (guild_id, log_type)
+        queue = self.queues.get(key)
+        if queue is None:
+            queue = self.queues[key] = _LogQueue()
+        queue.embeds.append(embed)
+        queue.chars += len(embed)
+        self.stats['queued'] += 1
+        if len(queue.embeds) > LOG_QUEUE_MAX:
+            queue.chars -= len(queue.embeds.popleft())
+            self.stats['dropped'] += 1
+        if len(queue.embeds) >= LOG_BATCH_MAX or queue.chars >= LOG_BATCH_CHARS:
+            queue.full.set()
+        if queue.worker is None:
+            queue.worker = asyncio.create_task(self._worker(key, queue))
+
+    def close(self):
+        for queue in self.queues.values():
+            if queue.worker: queue.worker.cancel()
+        self.queues.clear()
+
+    @staticmethod
+    def _take_batch(queue: _LogQueue):
+        """Retire un lot respectant les deux limites (nombre et texte cumulé). Un embed trop gros part seul."""
+        batch, chars = [], 0
+        while queue.embeds and len(batch) < LOG_BATCH_MAX:
+            size = len(queue.embeds[0])
+            if batch and chars + size > LOG_BATCH_CHARS: break
+            batch.append(queue.embeds.popleft())
+            chars += size
+        queue.chars -= chars
+        return batch
+
+    async def _worker(self, key, queue: _LogQueue):
+        try:
+            while queue.embeds:
+                if not queue.full.is_set():
+                    try:
+                        await asyncio.wait_for(queue.full.wait(), timeout=LOG_BATCH_WINDOW)
+                    except asyncio.TimeoutError:
+                        pass
+                batch = self._take_batch(queue)
+                if len(queue.embeds) < LOG_BATCH_MAX and queue.chars < LOG_BATCH_CHARS:
+                    queue.full.clear()
+                try:
+                    await self.deliver(*key, batch)
+                    self.stats['sent'] += len(batch)
+                    self.stats['messages'] += 1
+                except Exception as e:
+                    # HTTPException, mais aussi les erreurs réseau de la session des webhooks (aiohttp) :
+                    # le lot est perdu, le worker continue de vider la file
+                    self.stats['failed'] += len(batch)
+                    print(f"Erreur lors de l'envoi des logs {key[1]} du serveur {key[0]}: {e}")
+        finally:
+            queue.worker = None
+            if not queue.embeds:
+                self.queues.pop(key, None)
@@ -0,0 +1,88 @@
+# utils/rate_tracker.py
+import time
+from collections import OrderedDict, deque
+
+MAX_KEYS_PER_GUILD = 5000 # (membre, action) suivis au maximum par serveur
+SWEEP_EVERY = 256 # nombre d'appels à hit() entre deux purges d'un serveur
+
+class _Window:
+    __slots__ = ('hits', 'expires')
+
+    def __init__(self, limit: int):
+        self.hits = deque(maxlen=limit) # seuls les `limit` derniers instants comptent
+        self.expires = 0.0
+
+class RateTracker:
+    """
+    Compteurs à fenêtre glissante par (serveur, membre, action).
+    - Chaque clé ne garde que ses `limit` derniers instants (deque bornée).
+    - Les clés inactives depuis plus que leur fenêtre sont purgées au fil de l'eau.
+    - Chaque serveur est plafonné à MAX_KEYS_PER_GUILD clés : la moins récemment
+      active est évincée, ce qui borne la mémoire même face à un flood de comptes.
+    """
+    def __init__(self, max_keys_per_guild: int = MAX_KEYS_PER_GUILD, clock=time.monotonic):
+        self.max_keys_per_guild = max_keys_per_guild
+        self._clock = clock
+        self._guilds = {} # {guild_id: OrderedDict[(user_id, action), _Window]}, du moins au plus récent
+        self._calls = 0
+        self.stats = {'evicted_idle': 0, 'evicted_cap': 0}
+
+    def __len__(self):
+        return sum(len(keys) for keys in self._guilds.values())
+
+    def hit(self, guild_id: int, user_id: int, action: str, limit: int, window: float) -> int:
+        """Enregistre une action et renvoie le nombre d'actions de cette clé dans la fenêtre (au plus `limit`)."""
+        now = self._clock()
+        keys = self._guilds.get(guild_id)
+        if keys is None:
+            keys = self._guilds[guild_id] = OrderedDict()
+        key = (user_id, action)
+        entry = keys.get(key)
+        if entry is None or entry.hits.maxlen != limit:
+            entry = keys[key] = _Window(max(1, limit))
+            if len(keys) > self.max_keys_per_guild:
+                keys.popitem(last=False)
+                self.stats['evicted_cap'] += 1
+        else:
+            keys.move_to_end(key)
+        entry.hits.append(now)
+        entry.expires = now + window
+
+        self._calls += 1
+        if self._calls % SWEEP_EVERY == 0:
+            self._sweep(guild_id, now)
+
+        hits = entry.hits
+        count = len(hits)
+        for t in hits:
+            if now - t <= window: break
+            count -= 1
+        return count
+
+    def reset(self, guild_id: int, user_id: int = None):
+        """Oublie un membre (après sanction) ou tout un serveur."""
+        if user_id is None:
+            self._guilds.pop(guild_id, None)
+            return
+        keys = self._guilds.get(guild_id)
+        if not keys: return
+        for key in [k for k in keys if k[0] == user_id]:
+            del keys[key]
+
+    def _sweep(self, guild_id: int, now: float):
+        # Les clés sont rangées de la moins à la plus récemment active : on s'arrête
+        # à la première encore valide (les fenêtres différentes rendent l'ordre approximatif).
+        keys = self._guilds[guild_id]
+        while keys:
+            key, entry = next(iter(keys.items()))
+            if entry.expires > now: break
+            del keys[key]
+            self.stats['evicted_idle'] += 1
+        if not keys:
+            del self._guilds[guild_id]
+
+    def sweep_all(self):
+        """Purge complète, à appeler périodiquement pour les serveurs devenus silencieux."""
+        now = self._clock()
+        for guild_id in list(self._guilds):
+            self._sweep(guild_id, now)
@@ -0,0 +1,52 @@
+# utils/scheduler.py
+import asyncio
+import heapq
+import time
+
+class DeadlineScheduler:
+    """
+    Planificateur d'échéances basé sur un tas (min-heap) de (échéance, clé).
+    On dort exactement jusqu'à la prochaine échéance au lieu de sonder la base
+    à intervalle fixe. L'horloge est injectable pour pouvoir le tester.
+    """
+    def __init__(self, clock=time.time):
+        self._clock = clock
+        self._heap = []
+        self._changed = asyncio.Event()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def now(self) -> float:
+        """Instant courant selon l'horloge du planificateur (à utiliser pour calculer les échéances)."""
+        return self._clock()
+
+    def schedule(self, deadline: float, key):
+        """Ajoute une échéance (timestamp). Réveille l'attente si elle devient la plus proche."""
+        heapq.heappush(self._heap, (deadline, key))
+        if self._heap[0] == (deadline, key):
+            self._changed.set()
+
+    def pop_due(self):
+        """Retire et renvoie toutes les clés dont l'échéance est passée."""
+        now = self.now()
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            due.append(heapq.heappop(self._heap)[1])
+        return due
+
+    def next_delay(self):
+        """Secondes avant la prochaine échéance, ou None si rien n'est planifié."""
+        if not self._heap: return None
+        return max(0.0, self._heap[0][0] - self.now())
+
+    async def wait_due(self):
+        """Attend la prochaine échéance et renvoie les clés arrivées à terme."""
+        while True:
+            due = self.pop_due()
+            if due: return due
+            self._changed.clear()
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=self.next_delay())
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,66 @@
+# utils/snipe_store.py
+import discord
+import datetime
+import time
+from collections import OrderedDict, deque
+
+SNIPE_TTL = 60 # secondes pendant lesquelles un message supprimé peut être snipé
+SNIPE_HISTORY = 5 # messages gardés par salon (/snipe index:N)
+SNIPE_MAX_CHANNELS = 5000 # salons suivis au maximum, tous serveurs confondus
+
+class SnipeRecord:
+    """Copie minimale d'un message supprimé (aucune référence vers le Member ou le Message)."""
+    __slots__ = ('author_id', 'author_name', 'avatar_url', 'color', 'content', 'deleted_at', 'expires')
+
+    def __init__(self, message: discord.Message, expires: float):
+        author = message.author
+        self.author_id = author.id
+        self.author_name = str(author)
+        self.avatar_url = author.display_avatar.url
+        self.color = author.color.value if isinstance(author, discord.Member) else 0
+        self.content = message.content
+        self.deleted_at = datetime.datetime.now(datetime.timezone.utc)
+        self.expires = expires
+
+class SnipeStore:
+    """
+    Derniers messages supprimés par salon, avec expiration (TTL) et taille bornée.
+    Les salons sont rangés du moins au plus récemment alimenté : avec un TTL unique, les
+    entrées expirées sont toujours en tête, la purge paresseuse s'arrête à la première valide.
+    """
+    def __init__(self, ttl: float = SNIPE_TTL, history: int = SNIPE_HISTORY, max_channels: int = SNIPE_MAX_CHANNELS, clock=time.monotonic):
+        self.ttl = ttl
+        self.history = history
+        self.max_channels = max_channels
+        self._clock = clock
+        self._channels = OrderedDict() # {channel_id: deque([SnipeRecord]), le plus récent à droite}
+
+    def __len__(self):
+        return len(self._channels)
+
+    def add(self, message: discord.Message):
+        now = self._clock()
+        self._sweep(now)
+        records = self._channels.get(message.channel.id)
+        if records is None:
+            records = self._channels[message.channel.id] = deque(maxlen=self.history)
+            if len(self._channels) > self.max_channels:
+                self._channels.popitem(last=False)
+        else:
+            self._channels.move_to_end(message.channel.id)
+        records.append(SnipeRecord(message, now + self.ttl))
+
+    def get(self, channel_id: int, index: int = 1):
+        """Renvoie le N-ième message supprimé encore valide du salon (1 = le plus récent), ou None."""
+        now = self._clock()
+        self._sweep(now)
+        records = self._channels.get(channel_id)
+        if not records or index > len(records): return None
+        record = records[-index]
+        return record if record.expires > now else None
+
+    def _sweep(self, now: float):
+        while self._channels:
+            channel_id, records = next(iter(self._channels.items()))
+            if records[-1].expires > now: break
+            del self._channels[channel_id]
@@ -0,0 +1,69 @@
+# utils/templates.py
+from functools import lru_cache
+from operator import attrgetter
+from string import Formatter
+
+# Seuls ces champs sont autorisés dans les messages de bienvenue / départ.
+# (str.format permettait de parcourir n'importe quel attribut de l'objet.)
+ALLOWED_FIELDS = {
+    'member': ('mention', 'name', 'display_name', 'id'),
+    'server': ('name', 'member_count', 'id'),
+}
+ALLOWED_FIELDS_HELP = ", ".join(f"`{{{root}.{attr}}}`" for root, attrs in ALLOWED_FIELDS.items() for attr in attrs)
+
+class TemplateError(ValueError):
+    pass
+
+class CompiledTemplate:
+    """Message pré-analysé : une suite de textes fixes et d'accès à des champs autorisés."""
+    __slots__ = ('source', 'parts')
+
+    def __init__(self, source: str, parts):
+        self.source = source
+        self.parts = parts # tuple de (texte, racine ou None, getter)
+
+    def render(self, member, server) -> str:
+        roots = {'member': member, 'server': server}
+        out = []
+        for literal, root, getter in self.parts:
+            out.append(literal)
+            if root is not None:
+                out.append(str(getter(roots[root])))
+        return "".join(out)
+
+def _parse(source: str, strict: bool):
+    parts = []
+    for literal, field, spec, conversion in Formatter().parse(source):
+        if field is None:
+            parts.append((literal, None, None))
+            continue
+        root, _, attr = field.partition('.')
+        # Pas de conversion (!r) ni de format (:...) : uniquement des champs simples
+        if conversion or spec or attr not in ALLOWED_FIELDS.get(root, ()):
+            if strict: raise TemplateError(f"Champ non autorisé : {{{field}}}")
+            # Ancien message non conforme : le champ est affiché tel quel
+            parts.append((literal + "{" + field + "}", None, None))
+            continue
+        parts.append((literal, root, attrgetter(attr)))
+    return tuple(parts)
+
+def compile_template(source: str) -> CompiledTemplate:
+    """Compile et valide un message ; lève TemplateError si un champ n'est pas autorisé."""
+    try:
+        return CompiledTemplate(source, _parse(source, strict=True))
+    except TemplateError:
+        raise
+    except ValueError as e:
+        raise TemplateError(f"Message invalide : {e}")
+
+@lru_cache(maxsize=1024)
+def _compiled_for_render(source: str) -> CompiledTemplate:
+    try:
+        return CompiledTemplate(source, _parse(source, strict=False))
+    except ValueError:
+        # Accolades mal formées : on affiche le texte brut
+        return CompiledTemplate(source, ((source, None, None),))
+
+def render_template(source: str, member, server) -> str:
+    """Rend un message ; la compilation n'a lieu qu'une fois par texte (cache)."""
+    return _compiled_for_render(source).render(member, server)
@@ -0,0 +1,86 @@
+# utils/webhook_transport.py
+import discord
+import aiohttp
+import asyncio
+import time
+
+WEBHOOK_NAME = "Logs"
+WEBHOOK_CONNECTIONS = 20 # connexions HTTP simultanées max dans la session partagée
+WEBHOOK_FORBIDDEN_TTL = 600 # secondes avant de réessayer un salon où la permission manquait
+
+class WebhookTransport:
+    """
+    Envoi des logs via un webhook par salon plutôt que par le bot lui-même.
+    Les webhooks ont leurs propres buckets de rate-limit : les logs ne consomment plus
+    le budget des commandes (sanctions, anti-raid). Un seul webhook est créé par salon
+    (réutilisé entre les redémarrages) et toutes les requêtes passent par une même session aiohttp.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self._session = None
+        self._webhooks = {} # {channel_id: discord.Webhook}
+        self._locks = {} # {channel_id: asyncio.Lock}, évite de créer deux webhooks pour un même salon
+        self._forbidden = {} # {channel_id: instant d'expiration}, salons sans la permission Gérer les webhooks
+        self.stats = {'sent': 0, 'created': 0, 'reused': 0}
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(connector=aiohttp.TCPConnector(limit=WEBHOOK_CONNECTIONS))
+        return self._session
+
+    async def close(self):
+        if self._session and not self._session.closed:
+            await self._session.close()
+        self._webhooks.clear()
+
+    def reset_forbidden(self, guild: discord.Guild):
+        """Réautorise les essais sur les salons d'un serveur (ex: après /logswebhook)."""
+        for channel in guild.channels:
+            self._forbidden.pop(channel.id, None)
+
+    def forget(self, channel_id: int, webhook: discord.Webhook = None):
+        """Oublie le webhook d'un salon (seulement s'il s'agit encore de `webhook`, si précisé)."""
+        if webhook is None or self._webhooks.get(channel_id) is webhook:
+            self._webhooks.pop(channel_id, None)
+
+    async def _get_webhook(self, channel: discord.TextChannel) -> discord.Webhook:
+        webhook = self._webhooks.get(channel.id)
+        if webhook: return webhook
+        lock = self._locks.setdefault(channel.id, asyncio.Lock())
+        async with lock:
+            webhook = self._webhooks.get(channel.id)
+            if webhook: return webhook
+            existing = next((w for w in await channel.webhooks() if w.token and w.user and w.user.id == self.bot.user.id), None)
+            if existing:
+                self.stats['reused'] += 1
+            else:
+                existing = await channel.create_webhook(name=WEBHOOK_NAME, reason="Envoi des logs")
+                self.stats['created'] += 1
+            # Rattaché à notre session : l'envoi ne passe plus par le client HTTP du bot
+            webhook = self._webhooks[channel.id] = discord.Webhook.partial(existing.id, existing.token, session=self.session)
+            return webhook
+
+    async def send(self, channel: discord.TextChannel, embeds: list) -> bool:
+        """
+        Envoie un lot d'embeds. Renvoie False si le bot ne peut pas gérer les webhooks du salon :
+        l'échec est mémorisé WEBHOOK_FORBIDDEN_TTL secondes pour ne pas le repayer à chaque lot.
+        """
+        expires = self._forbidden.get(channel.id)
+        if expires:
+            if time.monotonic() < expires: return False
+            del self._forbidden[channel.id]
+        for attempt in range(2):
+            try:
+                webhook = await self._get_webhook(channel)
+            except discord.Forbidden:
+                self._forbidden[channel.id] = time.monotonic() + WEBHOOK_FORBIDDEN_TTL
+                return False
+            try:
+                await webhook.send(embeds=embeds, username=self.bot.user.display_name, avatar_url=self.bot.user.display_avatar.url)
+                self.stats['sent'] += 1
+                return True
+            except discord.NotFound:
+                # Webhook supprimé depuis : on en recrée un une seule fois
+                self.forget(channel.id, webhook)
+                if attempt: raise